@@ -0,0 +1,178 @@
+# async_controller.py
+# ASGI front-end serving the same endpoints as web_controller.py.
+# Run with: python3 async_controller.py  (or uvicorn async_controller:app)
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+from create_log import init_logging
+
+log = init_logging("async_controller", "async_controller.log")
+from config import Config
+from aws_resources import (
+    ensure_bucket, upload_file_to_s3,
+    send_sqs_message, get_queue_url
+)
+from messages import new_request_id, encode_request, format_result, parse_label
+from result_dispatcher import ResultDispatcher, stored_reply
+from result_cache import ResultCache, hash_stream
+import metrics
+from metrics import histogram, counter
+
+# Initialize once
+ensure_bucket(Config.INPUT_BUCKET)
+ensure_bucket(Config.OUTPUT_BUCKET)
+request_queue_url = get_queue_url(Config.REQUEST_QUEUE)
+dispatcher = ResultDispatcher.open() if Config.RESULT_DELIVERY == "queue" else None
+reply_to = dispatcher.queue_url if dispatcher else None
+cache = ResultCache(
+    Config.RESULT_CACHE_SIZE, Config.OUTPUT_BUCKET if Config.RESULT_CACHE_PERSIST else None
+) if Config.RESULT_CACHE_SIZE > 0 else None
+
+# Bounded pool for the blocking boto3 calls; waiting requests hold no thread.
+io_pool = ThreadPoolExecutor(max_workers=Config.ASYNC_IO_THREADS, thread_name_prefix="aws-io")
+
+
+async def run_io(func, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(io_pool, partial(func, *args, **kwargs))
+
+
+async def fetch_result(image_name, request_id):
+    return await run_io(stored_reply, image_name, request_id)
+
+
+async def poll_result(image_name, request_id, timeout):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        reply = await fetch_result(image_name, request_id)
+        if reply is not None:
+            return reply
+        await asyncio.sleep(1)
+    return None
+
+
+async def wait_for_result(image_name, request_id, future):
+    """Return the reply dict ("result", plus "confidence"/"tier" if known) or None."""
+    if future is None:
+        return await poll_result(image_name, request_id, Config.WEB_TIMEOUT)
+    try:
+        # shield: a timeout must not cancel the dispatcher's future.
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), Config.WEB_TIMEOUT)
+    except asyncio.TimeoutError:
+        # The reply may have been lost; the worker also wrote it to S3.
+        return await fetch_result(image_name, request_id)
+
+
+class aspan:
+    """Async counterpart of metrics.span."""
+
+    def __init__(self, name, help_text=""):
+        self.hist = histogram(name, help_text)
+
+    async def __aenter__(self):
+        self.start = time.perf_counter()
+
+    async def __aexit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.start)
+
+
+async def submit_job(image_name, stream):
+    async with aspan("controller_upload_seconds", "Upload of the image to the input bucket"):
+        await run_io(upload_file_to_s3, Config.INPUT_BUCKET, image_name, stream)
+    log.info(f"Uploaded {image_name} to input bucket.")
+
+    request_id = new_request_id()
+    future = dispatcher.register(request_id) if dispatcher else None
+    try:
+        async with aspan("controller_enqueue_seconds", "Sending the request message"):
+            await run_io(send_sqs_message, request_queue_url, encode_request(image_name, request_id, reply_to),
+                         group_key=image_name)
+        log.info(f"Queued image {image_name} for processing.")
+        async with aspan("controller_wait_seconds", "Waiting for the worker's result"):
+            return await wait_for_result(image_name, request_id, future)
+    finally:
+        if dispatcher:
+            dispatcher.discard(request_id)
+
+
+async def cached_submit(image_name, stream):
+    digest = await run_io(hash_stream, stream)
+    label = await run_io(cache.get, digest)
+    if label is not None:
+        log.info(f"Cache hit for {image_name} ({digest[:12]})")
+        return {"result": format_result(image_name, label)}
+
+    future, leader = cache.claim(digest)
+    if not leader:
+        log.info(f"Joining in-flight job for {image_name} ({digest[:12]})")
+        try:
+            # shield: the in-flight future is shared with the leader and other followers.
+            label = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), Config.WEB_TIMEOUT)
+        except asyncio.TimeoutError:
+            label = None
+        return {"result": format_result(image_name, label)} if label is not None else None
+
+    reply = None
+    try:
+        reply = await submit_job(image_name, stream)
+    finally:
+        label = parse_label(image_name, reply["result"]) if reply is not None else None
+        await run_io(cache.release, digest, label)
+    return reply
+
+
+async def status(request):
+    return PlainTextResponse("✅ Image classification controller is running.")
+
+
+async def predict(request):
+    form = await request.form()
+    image_file = form.get("myfile")
+    if image_file is None or not getattr(image_file, "filename", ""):
+        return JSONResponse({"error": "No file uploaded"}, status_code=400)
+
+    image_name = image_file.filename
+    log.info("Received image: %s", image_name)
+
+    try:
+        async with aspan("controller_request_seconds", "End-to-end /predict latency"):
+            if cache is None:
+                reply = await submit_job(image_name, image_file.file)
+            else:
+                reply = await cached_submit(image_name, image_file.file)
+    finally:
+        await image_file.close()
+
+    if reply is not None:
+        counter("controller_results_total", "Requests answered with a result").inc()
+        log.info(f"Got result for {image_name}: {reply['result']}")
+        return JSONResponse(reply, status_code=200)
+    counter("controller_timeouts_total", "Requests that timed out").inc()
+    return JSONResponse({"error": "Timed out waiting for result"}, status_code=504)
+
+
+async def stats(request):
+    return JSONResponse({"cache": cache.stats() if cache else None})
+
+
+async def metrics_endpoint(request):
+    gauges = {f"controller_cache_{k}": v for k, v in cache.stats().items()} if cache else {}
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+app = Starlette(routes=[
+    Route("/", status, methods=["GET"]),
+    Route("/predict", predict, methods=["POST"]),
+    Route("/stats", stats, methods=["GET"]),
+    Route("/metrics", metrics_endpoint, methods=["GET"]),
+])
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=Config.ASYNC_WEB_PORT)
@@ -1,4 +1,6 @@
 # auto_scaler.py
+import os
+import csv
 import time
 from create_log import init_logging
 
@@ -6,35 +8,86 @@ log = init_logging("auto_scaler", "auto_scaler.log")
 
 from config import Config
 from aws_resources import (
-    get_queue_depth, list_instances_by_tag, launch_worker_instance, terminate_worker_instance
+    get_queue_depth, describe_workers, launch_worker_instances, terminate_worker_instance
 )
+from scaling_policy import make_policy
+from heartbeat import read_heartbeats, request_drain, clear_heartbeats
 
 
-def auto_scale(request_queue_url):
-    log.info("Auto-scaler started.")
+def pick_scale_in(workers, beats, count):
+    """Choose ``count`` instances to retire: least in-flight work first, then
+    the longest idle. Instances without a heartbeat (still booting) hold no
+    messages and sort with the idle ones."""
+    def load(inst_id):
+        beat = beats.get(inst_id)
+        if beat is None:
+            return 0, 0.0
+        return beat["in_flight"], beat["last_activity"]
+
+    return sorted(workers, key=load)[:count]
+
+
+def finish_drains(draining, workers, beats, now):
+    """Terminate draining instances once they are idle or the drain timed out."""
+    for inst_id, since in list(draining.items()):
+        beat = beats.get(inst_id)
+        if inst_id not in workers:
+            draining.pop(inst_id)
+        elif beat is None or beat["drained"] or now - since > Config.DRAIN_TIMEOUT:
+            terminate_worker_instance(inst_id)
+            clear_heartbeats(inst_id)
+            draining.pop(inst_id)
+
+
+def record_trace(path, now, depth, workers, ready):
+    """Append one sample in the format scaling_policy.load_trace replays."""
+    new_file = not os.path.exists(path)
+    with open(path, "a", newline="") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(["timestamp", "depth", "workers", "ready"])
+        writer.writerow([f"{now:.3f}", depth, workers, ready])
+
+
+def auto_scale(request_queue_urls, policy=None):
+    """Scale on the combined depth of ``request_queue_urls`` (a queue or list of lanes)."""
+    policy = policy or make_policy()
+    log.info(f"Auto-scaler started ({type(policy).__name__}).")
+    draining = {}
     while True:
         try:
-            depth = get_queue_depth(request_queue_url)
+            depth = get_queue_depth(request_queue_urls)
+
+            now = time.time()
+            described = describe_workers(["pending", "running"])
+            beats = read_heartbeats()
+            finish_drains(draining, [w["id"] for w in described], beats, now)
 
-            workers = list_instances_by_tag("Role", Config.WORKER_TAG, ["pending", "running"])
+            # Instances being drained are already on their way out.
+            described = [w for w in described if w["id"] not in draining]
+            workers = [w["id"] for w in described]
             num_instances = len(workers)
-            log.info(f"Queue depth: {depth}, Active workers: {num_instances}")
+            num_ready = sum(1 for w in described if w["ready"])
+            rates = [b["service_rate"] for b in beats.values() if b.get("service_rate")]
+            if rates and hasattr(policy, "service_rate"):
+                # Per-instance rate measured by the workers themselves.
+                policy.service_rate = sum(rates) / len(rates)
+            log.info(f"Queue depth: {depth}, Active workers: {num_instances} ({num_ready} serving, "
+                     f"{num_instances - num_ready} booting)")
 
-            desired = min(Config.MAX_WORKERS, max(Config.MIN_WORKERS, depth // Config.TASKS_PER_WORKER + 1))
+            if Config.SCALER_TRACE:
+                record_trace(Config.SCALER_TRACE, now, depth, num_instances, num_ready)
 
-            if depth >= 40:
-                desired = max(10, desired)
+            desired = policy.desired(now, depth, num_instances, num_ready)
 
-                # 启动实例只在未达到 desired 的前提下进行
+            # 启动实例只在未达到 desired 的前提下进行
             if num_instances < desired:
                 launch_count = min(desired - num_instances, Config.MAX_WORKERS - num_instances)
-                for _ in range(launch_count):
-                    launch_worker_instance()
-                    time.sleep(2)
+                launch_worker_instances(launch_count)
             elif num_instances > desired:
-                to_terminate = workers[:num_instances - desired]
-                for inst_id in to_terminate:
-                    terminate_worker_instance(inst_id)
+                for inst_id in pick_scale_in(workers, beats, num_instances - desired):
+                    request_drain(inst_id)
+                    draining[inst_id] = now
 
         except Exception as e:
             log.error(f"Auto-scale error: {e}")
@@ -0,0 +1,74 @@
+# aws_clients.py
+import os
+import threading
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+from config import Config
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def client_config() -> BotoConfig:
+    """Connection pool, keep-alive, retry and timeout settings for every client.
+
+    read_timeout has to stay above the 20s SQS long-poll wait.
+    """
+    return BotoConfig(
+        region_name=Config.REGION,
+        max_pool_connections=Config.AWS_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=Config.AWS_TCP_KEEPALIVE,
+        connect_timeout=Config.AWS_CONNECT_TIMEOUT,
+        read_timeout=Config.AWS_READ_TIMEOUT,
+        retries={"mode": Config.AWS_RETRY_MODE, "max_attempts": Config.AWS_MAX_ATTEMPTS},
+    )
+
+
+# Images are far below the multipart threshold, so each transfer is a single
+# request; running it on the calling thread avoids spinning up s3transfer's
+# thread pool per object when callers already parallelize.
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=Config.S3_MULTIPART_THRESHOLD,
+    multipart_chunksize=Config.S3_MULTIPART_THRESHOLD,
+    max_concurrency=max(1, Config.S3_TRANSFER_THREADS),
+    use_threads=Config.S3_TRANSFER_THREADS > 1,
+)
+
+
+def get_client(service):
+    """This process's shared client for ``service``.
+
+    Low-level clients are thread-safe once built, but building them (and
+    boto3 sessions in general) is not, so creation happens under a lock with
+    a private session.
+    """
+    client = _clients.get(service)
+    if client is None:
+        with _lock:
+            client = _clients.get(service)
+            if client is None:
+                client = boto3.session.Session().client(service, config=client_config())
+                _clients[service] = client
+    return client
+
+
+def _reset_after_fork():
+    # A forked child must not reuse the parent's pooled sockets.
+    global _lock
+    _clients.clear()
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class SharedClient:
+    """Module-level stand-in that forwards to the current process's client."""
+
+    def __init__(self, service):
+        self.service = service
+
+    def __getattr__(self, name):
+        return getattr(get_client(self.service), name)
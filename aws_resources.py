@@ -1,36 +1,113 @@
 from typing import List
-import boto3, time
+import time
+import tempfile
+import zlib
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import BotoCoreError, ClientError
 from config import Config
+from aws_clients import SharedClient, TRANSFER_CONFIG
 
 from create_log import init_logging
 
 log = init_logging("aws", "aws.log")
 import uuid
 
-s3 = boto3.client("s3", region_name=Config.REGION)
-sqs = boto3.client("sqs", region_name=Config.REGION)
-ec2 = boto3.client("ec2", region_name=Config.REGION)
-iam = boto3.client("iam", region_name=Config.REGION)
+if Config.STORAGE_BACKEND == "local":
+    # Single-node / benchmark mode: in-process S3 and SQS with the same API.
+    from local_backend import LocalS3, LocalSQS
+
+    s3 = LocalS3()
+    sqs = LocalSQS()
+else:
+    s3 = SharedClient("s3")
+    sqs = SharedClient("sqs")
+ec2 = SharedClient("ec2")
+iam = SharedClient("iam")
 BOTOCORE_ERROR = BotoCoreError
 CLIENT_ERROR = ClientError
 
 
 # -------- S3 Utilities --------
-def clear_bucket(bucket_name):
+def clear_bucket(bucket_name, prefix=""):
     log.info(f"Clearing all objects from bucket: {bucket_name}")
+    deleted, failed = delete_keys(bucket_name, iter_object_keys(bucket_name, prefix))
+    if failed:
+        log.warning(f"{len(failed)} object(s) could not be deleted from {bucket_name}")
+    log.info(f"Bucket {bucket_name} cleared ({deleted} object(s) deleted).")
 
-    response = s3.list_objects_v2(Bucket=bucket_name)
-    if "Contents" not in response:
-        log.info("Bucket already empty.")
-        return
 
-    for obj in response["Contents"]:
-        key = obj["Key"]
-        s3.delete_object(Bucket=bucket_name, Key=key)
-        log.info(f"Deleted {key} from {bucket_name}")
+def _delete_chunk(bucket, keys):
+    try:
+        resp = s3.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": k} for k in keys], "Quiet": True})
+    except CLIENT_ERROR as e:
+        log.error(f"Batch delete on {bucket} failed: {e}")
+        return keys
+    errors = resp.get("Errors", [])
+    for err in errors[:5]:
+        log.error(f"Failed to delete {err['Key']} from {bucket}: {err.get('Message')}")
+    return [err["Key"] for err in errors]
 
-    log.info(f"Bucket {bucket_name} cleared.")
+
+def delete_keys(bucket, keys, threads=None, progress_every=10000):
+    """Delete an iterable of keys with concurrent 1000-key DeleteObjects calls.
+
+    ``keys`` is consumed lazily (e.g. straight from iter_object_keys) with at
+    most ``2 * threads`` chunks in flight. Returns (deleted, failed_keys).
+    """
+    threads = threads or Config.DELETE_THREADS
+    deleted, failed, reported = 0, [], 0
+    pending = []
+
+    def collect(future, chunk):
+        nonlocal deleted, reported
+        errors = future.result()
+        failed.extend(errors)
+        deleted += len(chunk) - len(errors)
+        if deleted - reported >= progress_every:
+            reported = deleted
+            log.info(f"Deleted {deleted} object(s) from {bucket} so far")
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="s3-delete") as pool:
+        chunk = []
+        for key in keys:
+            chunk.append(key)
+            if len(chunk) == 1000:
+                pending.append((pool.submit(_delete_chunk, bucket, chunk), chunk))
+                chunk = []
+                if len(pending) >= 2 * threads:
+                    collect(*pending.pop(0))
+        if chunk:
+            pending.append((pool.submit(_delete_chunk, bucket, chunk), chunk))
+        for future, chunk in pending:
+            collect(future, chunk)
+    return deleted, failed
+
+
+def expire_objects(bucket, days=1, prefix=""):
+    """Let an S3 lifecycle rule delete everything under ``prefix`` after ``days``.
+
+    S3 removes expired objects in the background at no request cost, which
+    beats synchronous deletes for very large buckets. Other lifecycle rules
+    on the bucket are kept.
+    """
+    rule_id = f"expire-{prefix or 'all'}"
+    try:
+        rules = s3.get_bucket_lifecycle_configuration(Bucket=bucket)["Rules"]
+    except CLIENT_ERROR as e:
+        if e.response["Error"]["Code"] != "NoSuchLifecycleConfiguration":
+            raise
+        rules = []
+    rules = [r for r in rules if r.get("ID") != rule_id]
+    rules.append({
+        "ID": rule_id,
+        "Filter": {"Prefix": prefix},
+        "Status": "Enabled",
+        "Expiration": {"Days": max(1, int(days))},
+        "AbortIncompleteMultipartUpload": {"DaysAfterInitiation": 1},
+    })
+    s3.put_bucket_lifecycle_configuration(Bucket=bucket, LifecycleConfiguration={"Rules": rules})
+    log.info(f"Objects under s3://{bucket}/{prefix} expire after {max(1, int(days))} day(s)")
 
 
 def ensure_bucket(bucket_name):
@@ -47,14 +124,23 @@ def ensure_bucket(bucket_name):
             raise
 
 
-def ensure_queue(queue_name, fifo=True):
+def ensure_queue(queue_name, fifo=None):
+    """Create (or look up) a queue. FIFO is inferred from a ``.fifo`` name.
+
+    A standard queue is the better choice for throughput: workers write
+    results idempotently, so its occasional duplicate delivery is harmless.
+    """
     log.info("ensure_queue() called")
+    if fifo is None:
+        fifo = queue_name.endswith(".fifo")
 
     attributes = {
-        "FifoQueue": "true",
-        "ContentBasedDeduplication": "true",
-        "VisibilityTimeout": "30"
-    } if fifo else {}
+        "VisibilityTimeout": str(Config.VISIBILITY_TIMEOUT),
+        "ReceiveMessageWaitTimeSeconds": "20",
+    }
+    if fifo:
+        attributes["FifoQueue"] = "true"
+        attributes["ContentBasedDeduplication"] = "true"
 
     try:
         result = sqs.create_queue(
@@ -66,10 +152,14 @@ def ensure_queue(queue_name, fifo=True):
         return queue_url
 
     except CLIENT_ERROR as e:
-        if e.response["Error"]["Code"] == "QueueAlreadyExists":
+        if e.response["Error"]["Code"] in ("QueueAlreadyExists", "QueueNameExists"):
             log.warning("Queue %s already exists. Fetching existing URL...", queue_name)
             result = sqs.get_queue_url(QueueName=queue_name)
             queue_url = result["QueueUrl"]
+            sqs.set_queue_attributes(
+                QueueUrl=queue_url,
+                Attributes={k: v for k, v in attributes.items() if k not in ("FifoQueue",)}
+            )
             log.info("Fetched existing queue %s → %s", queue_name, queue_url)
             return queue_url
         else:
@@ -92,43 +182,142 @@ def purge_queue(queue_name):
             raise
 
 
-def upload_file_to_s3(bucket: str, key: str, data, is_path=False):
+def delete_queue(queue_url):
+    try:
+        sqs.delete_queue(QueueUrl=queue_url)
+        log.info(f"Deleted queue {queue_url}")
+    except Exception as e:
+        log.warning(f"Failed to delete queue {queue_url}: {e}")
+
+
+def delete_queues(name_prefix):
+    """Delete every queue whose name starts with ``name_prefix``; returns the count."""
+    urls = sqs.list_queues(QueueNamePrefix=name_prefix).get("QueueUrls", [])
+    for url in urls:
+        delete_queue(url)
+    return len(urls)
+
+
+def upload_file_to_s3(bucket: str, key: str, data, is_path=False, metadata=None):
+    extra = {"Metadata": metadata} if metadata else None
     try:
         if is_path:
             with open(data, "rb") as f:
-                s3.upload_fileobj(f, bucket, key)
+                s3.upload_fileobj(f, bucket, key, ExtraArgs=extra, Config=TRANSFER_CONFIG)
+        elif hasattr(data, "read"):
+            s3.upload_fileobj(data, bucket, key, ExtraArgs=extra, Config=TRANSFER_CONFIG)
         else:
-            s3.put_object(Bucket=bucket, Key=key, Body=data)
+            s3.put_object(Bucket=bucket, Key=key, Body=data, **(extra or {}))
         log.info(f"Uploaded {key} to {bucket}")
+        return True
     except Exception as e:
         log.error(f"Failed to upload {key} to {bucket}: {e}")
+        return False
 
 
 def download_file_from_s3(bucket, key, download_path):
-    s3.download_file(bucket, key, download_path)
+    s3.download_file(bucket, key, download_path, Config=TRANSFER_CONFIG)
     log.info(f"Downloaded {key} from {bucket} → {download_path}")
 
 
+def download_to_buffer(bucket, key, max_memory=None):
+    """Download an object into a file-like buffer positioned at 0.
+
+    Objects up to ``max_memory`` bytes stay in memory; larger ones roll over
+    to a temporary file that is removed when the buffer is closed.
+    """
+    if max_memory is None:
+        max_memory = Config.MAX_INMEMORY_BYTES
+    buf = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        s3.download_fileobj(bucket, key, buf, Config=TRANSFER_CONFIG)
+    except Exception:
+        buf.close()
+        raise
+    buf.seek(0)
+    return buf
+
+
 def get_object_text(bucket, key):
     response = s3.get_object(Bucket=bucket, Key=key)
     return response['Body'].read().decode("utf-8")
 
 
+def get_object_text_and_metadata(bucket, key):
+    """Object body as text plus its user metadata, from a single GET."""
+    response = s3.get_object(Bucket=bucket, Key=key)
+    return response['Body'].read().decode("utf-8"), response.get("Metadata", {})
+
+
+def object_exists(bucket, key) -> bool:
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+        return True
+    except CLIENT_ERROR as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def delete_object(bucket, key):
+    s3.delete_object(Bucket=bucket, Key=key)
+
+
 # -------- SQS Utilities --------
 def get_queue_url(name):
     return sqs.get_queue_url(QueueName=name)["QueueUrl"]
 
 
-def send_sqs_message(queue_url, body):
+def message_group_id(group_key) -> str:
+    """Spread FIFO messages over Config.MESSAGE_GROUPS groups.
+
+    FIFO queues hold back a group while any of its messages is in flight, so a
+    single group would let only one worker make progress at a time.
+    """
+    if Config.MESSAGE_GROUPS <= 1:
+        return "default"
+    return f"g{zlib.crc32(group_key.encode('utf-8')) % Config.MESSAGE_GROUPS}"
+
+
+def send_sqs_message(queue_url, body, group_key=None):
     params = {"QueueUrl": queue_url, "MessageBody": body}
     if queue_url.endswith(".fifo"):
-        params["MessageGroupId"] = "default"
+        params["MessageGroupId"] = message_group_id(group_key or body)
         params["MessageDeduplicationId"] = str(uuid.uuid4())
     resp = sqs.send_message(**params)
     log.info(f"Sent message to SQS {queue_url}")
     return resp["MessageId"]
 
 
+def send_sqs_messages(queue_url, bodies, group_keys=None) -> List[int]:
+    """Send bodies with send_message_batch, 10 per call.
+
+    Returns the indexes (into ``bodies``) of the messages that were not sent.
+    """
+    bodies = list(bodies)
+    group_keys = list(group_keys) if group_keys is not None else bodies
+    failed = []
+    for start in range(0, len(bodies), 10):
+        entries = []
+        for i, body in enumerate(bodies[start:start + 10]):
+            entry = {"Id": str(i), "MessageBody": body}
+            if queue_url.endswith(".fifo"):
+                entry["MessageGroupId"] = message_group_id(group_keys[start + i])
+                entry["MessageDeduplicationId"] = str(uuid.uuid4())
+            entries.append(entry)
+        try:
+            resp = sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+        except (CLIENT_ERROR, BOTOCORE_ERROR) as e:
+            log.error(f"Batch send failed on {queue_url}: {e}")
+            failed.extend(range(start, start + len(entries)))
+            continue
+        for f in resp.get("Failed", []):
+            log.error(f"Failed to send message {f['Id']} to {queue_url}: {f.get('Message')}")
+            failed.append(start + int(f["Id"]))
+    log.info(f"Sent {len(bodies) - len(failed)} message(s) to SQS {queue_url}")
+    return failed
+
+
 def receive_sqs_message(queue_url, wait=10):
     resp = sqs.receive_message(
         QueueUrl=queue_url,
@@ -142,13 +331,67 @@ def receive_sqs_message(queue_url, wait=10):
     return msg["Body"], msg["ReceiptHandle"]
 
 
+def receive_sqs_messages(queue_url, max_messages=10, wait=10):
+    """Receive up to 10 messages (the SQS limit) as a list of (body, receipt)."""
+    resp = sqs.receive_message(
+        QueueUrl=queue_url,
+        MaxNumberOfMessages=max(1, min(max_messages, 10)),
+        WaitTimeSeconds=wait
+    )
+    return [(msg["Body"], msg["ReceiptHandle"]) for msg in resp.get("Messages", [])]
+
+
 def delete_sqs_message(queue_url, receipt_handle):
     sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=receipt_handle)
     log.info(f"Deleted message from {queue_url}")
 
 
+def delete_sqs_messages(queue_url, receipt_handles) -> List[str]:
+    """Batch-delete receipts, 10 per call. Returns the receipts that failed."""
+    failed = []
+    receipt_handles = list(receipt_handles)
+    for start in range(0, len(receipt_handles), 10):
+        chunk = receipt_handles[start:start + 10]
+        entries = [{"Id": str(i), "ReceiptHandle": r} for i, r in enumerate(chunk)]
+        try:
+            resp = sqs.delete_message_batch(QueueUrl=queue_url, Entries=entries)
+        except CLIENT_ERROR as e:
+            log.error(f"Batch delete failed on {queue_url}: {e}")
+            failed.extend(chunk)
+            continue
+        for f in resp.get("Failed", []):
+            log.error(f"Failed to delete message {f['Id']}: {f.get('Message')}")
+            failed.append(chunk[int(f["Id"])])
+    log.info(f"Deleted {len(receipt_handles) - len(failed)} message(s) from {queue_url}")
+    return failed
+
+
+def change_visibility_batch(queue_url, receipt_handles, timeout) -> List[str]:
+    """Set the visibility timeout of held messages, 10 per call. Returns failed receipts."""
+    failed = []
+    receipt_handles = list(receipt_handles)
+    for start in range(0, len(receipt_handles), 10):
+        chunk = receipt_handles[start:start + 10]
+        entries = [{"Id": str(i), "ReceiptHandle": r, "VisibilityTimeout": int(timeout)}
+                   for i, r in enumerate(chunk)]
+        try:
+            resp = sqs.change_message_visibility_batch(QueueUrl=queue_url, Entries=entries)
+        except CLIENT_ERROR as e:
+            log.error(f"Visibility change failed on {queue_url}: {e}")
+            failed.extend(chunk)
+            continue
+        failed.extend(chunk[int(f["Id"])] for f in resp.get("Failed", []))
+    return failed
+
+
 def get_queue_depth(queue_url):
-    """Get total queue depth: visible + in-flight (not visible)"""
+    """Get total queue depth: visible + in-flight (not visible).
+
+    ``queue_url`` may also be a list of queues (e.g. every priority lane),
+    in which case the depths are summed.
+    """
+    if not isinstance(queue_url, str):
+        return sum(get_queue_depth(url) for url in queue_url)
     try:
         attrs = sqs.get_queue_attributes(
             QueueUrl=queue_url,
@@ -189,11 +432,13 @@ def get_default_sg_id():
 
 def get_default_iam_profile():
     log.info(f"Looking up IAM instance profile '{Config.IAM_INSTANCE_PROFILE}'...")
-    profiles = iam.list_instance_profiles().get("InstanceProfiles", [])
-    for p in profiles:
-        if p["InstanceProfileName"] == Config.IAM_INSTANCE_PROFILE:
-            return p["InstanceProfileName"]
-    return None
+    try:
+        profile = iam.get_instance_profile(InstanceProfileName=Config.IAM_INSTANCE_PROFILE)
+    except CLIENT_ERROR as e:
+        if e.response["Error"]["Code"] == "NoSuchEntity":
+            return None
+        raise
+    return profile["InstanceProfile"]["InstanceProfileName"]
 
 
 def list_instances_by_tag(tag_key: str, tag_value: str, states: list = None) -> list:
@@ -212,17 +457,55 @@ def list_instances_by_tag(tag_key: str, tag_value: str, states: list = None) ->
     return instances
 
 
-def launch_worker_instance():
-    ami = get_default_ami(Config.REGION)
-    sg_id = get_default_sg_id()
-    iam_profile = get_default_iam_profile()
+def describe_workers(states: list = None) -> List[dict]:
+    """Worker instances with their readiness, as reported by the worker itself."""
+    filters = [{"Name": "tag:Role", "Values": [Config.WORKER_TAG]}]
+    if states:
+        filters.append({"Name": "instance-state-name", "Values": states})
 
-    if not all([ami, sg_id, iam_profile]):
-        raise Exception(f"Missing parameters for EC2 launch. AMI: {ami}, SG: {sg_id}, IAM: {iam_profile}")
+    resp = ec2.describe_instances(Filters=filters)
+    workers = []
+    for r in resp["Reservations"]:
+        for inst in r["Instances"]:
+            tags = {t["Key"]: t["Value"] for t in inst.get("Tags", [])}
+            workers.append({
+                "id": inst["InstanceId"],
+                "state": inst["State"]["Name"],
+                "ready": tags.get("Status") == "ready",
+                "launch_time": inst.get("LaunchTime"),
+            })
+    return workers
+
+
+def tag_instance(instance_id, key, value):
+    ec2.create_tags(Resources=[instance_id], Tags=[{"Key": key, "Value": value}])
+    log.info(f"Tagged {instance_id} {key}={value}")
 
-    log.info(f"Launching worker instance with AMI={ami}, SG={sg_id}, IAM={iam_profile}...")
 
-    user_data_script = f"""#!/bin/bash
+_instance_id = None
+
+
+def get_instance_id(timeout=1):
+    """This machine's EC2 instance id via IMDSv2, or None when not on EC2."""
+    global _instance_id
+    if _instance_id is None:
+        try:
+            token_req = urllib.request.Request(
+                "http://169.254.169.254/latest/api/token", method="PUT",
+                headers={"X-aws-ec2-metadata-token-ttl-seconds": "60"}
+            )
+            token = urllib.request.urlopen(token_req, timeout=timeout).read().decode()
+            id_req = urllib.request.Request(
+                "http://169.254.169.254/latest/meta-data/instance-id",
+                headers={"X-aws-ec2-metadata-token": token}
+            )
+            _instance_id = urllib.request.urlopen(id_req, timeout=timeout).read().decode()
+        except Exception:
+            return None
+    return _instance_id
+
+
+COLD_USER_DATA = """#!/bin/bash
     yum update -y
     yum install -y git python3 python3-pip
     cd /home/ec2-user
@@ -235,23 +518,99 @@ def launch_worker_instance():
     python3 worker.py
     """
 
-    ec2.run_instances(
-        ImageId=ami,
-        InstanceType=Config.INSTANCE_TYPE,
-        MinCount=1,
-        MaxCount=1,
-        KeyName=Config.KEY_NAME,
-        SecurityGroupIds=[sg_id],
-        IamInstanceProfile={'Name': iam_profile},
-        TagSpecifications=[{
-            "ResourceType": "instance",
-            "Tags": [
-                {"Key": "Name", "Value": f"{Config.WORKER_TAG}-{int(time.time())}"},
-                {"Key": "Role", "Value": Config.WORKER_TAG}
-            ]
-        }],
-        UserData=user_data_script
-    )
+# For a baked AMI (Config.INSTANCE_AMI) that already holds the checkout, the
+# venv and the model cache: skip package installs and start serving at once.
+WARM_USER_DATA = """#!/bin/bash
+    cd /home/ec2-user/Image-recognition
+    source venv/bin/activate
+    python3 worker.py
+    """
+
+
+_launch_template = None
+_launch_template_at = 0.0
+
+# Errors where EC2 could not start any instance right now; the next scaling
+# round simply tries again.
+CAPACITY_ERRORS = ("InsufficientInstanceCapacity", "InstanceLimitExceeded", "VcpuLimitExceeded")
+
+
+def get_launch_template(ttl=None):
+    """run_instances parameters shared by every worker launch, cached for ``ttl`` seconds."""
+    global _launch_template, _launch_template_at
+    if ttl is None:
+        ttl = Config.LAUNCH_PARAMS_TTL
+    if _launch_template is not None and time.time() - _launch_template_at < ttl:
+        return _launch_template
+
+    ami = Config.INSTANCE_AMI or get_default_ami(Config.REGION)
+    sg_id = get_default_sg_id()
+    iam_profile = get_default_iam_profile()
+
+    if not all([ami, sg_id, iam_profile]):
+        raise Exception(f"Missing parameters for EC2 launch. AMI: {ami}, SG: {sg_id}, IAM: {iam_profile}")
+
+    _launch_template = {
+        "ImageId": ami,
+        "InstanceType": Config.INSTANCE_TYPE,
+        "KeyName": Config.KEY_NAME,
+        "SecurityGroupIds": [sg_id],
+        "IamInstanceProfile": {'Name': iam_profile},
+        "UserData": WARM_USER_DATA if Config.INSTANCE_AMI else COLD_USER_DATA,
+    }
+    _launch_template_at = time.time()
+    log.info(f"Resolved launch template AMI={ami}, SG={sg_id}, IAM={iam_profile}")
+    return _launch_template
+
+
+def invalidate_launch_template():
+    global _launch_template
+    _launch_template = None
+
+
+def launch_worker_instances(count) -> List[str]:
+    """Launch up to ``count`` workers in a single run_instances call.
+
+    EC2 starts as many as it has capacity for (at least one), so the returned
+    list of instance ids may be shorter than ``count``.
+    """
+    if count <= 0:
+        return []
+    params = get_launch_template()
+    log.info(f"Launching {count} worker instance(s)...")
+    try:
+        resp = ec2.run_instances(
+            MinCount=1,
+            MaxCount=count,
+            TagSpecifications=[{
+                "ResourceType": "instance",
+                "Tags": [
+                    {"Key": "Name", "Value": f"{Config.WORKER_TAG}-{int(time.time())}"},
+                    {"Key": "Role", "Value": Config.WORKER_TAG},
+                    {"Key": "Status", "Value": "booting"}
+                ]
+            }],
+            **params
+        )
+    except CLIENT_ERROR as e:
+        code = e.response["Error"]["Code"]
+        if code in CAPACITY_ERRORS:
+            log.warning(f"No capacity to launch workers: {code}")
+            return []
+        # Stale AMI / security group / profile: resolve again next time.
+        invalidate_launch_template()
+        raise
+
+    ids = [inst["InstanceId"] for inst in resp["Instances"]]
+    if len(ids) < count:
+        log.warning(f"Partial capacity: launched {len(ids)} of {count} worker(s)")
+    log.info(f"Launched {ids}")
+    return ids
+
+
+def launch_worker_instance():
+    ids = launch_worker_instances(1)
+    return ids[0] if ids else None
 
 
 
@@ -260,10 +619,21 @@ def terminate_worker_instance(instance_id):
     log.info(f"Terminated instance {instance_id}")
 
 
+def iter_object_keys(bucket: str, prefix: str = ""):
+    """Yield every key under ``prefix``, following list_objects_v2 pagination."""
+    params = {"Bucket": bucket, "Prefix": prefix}
+    while True:
+        response = s3.list_objects_v2(**params)
+        for obj in response.get("Contents", []):
+            yield obj["Key"]
+        if not response.get("IsTruncated"):
+            return
+        params["ContinuationToken"] = response["NextContinuationToken"]
+
+
 def list_objects_in_s3(bucket: str, prefix: str = "") -> List[str]:
-    response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
-    return [obj["Key"] for obj in response.get("Contents", [])]
+    return list(iter_object_keys(bucket, prefix))
 
 
 def download_from_s3(bucket: str, key: str, local_path: str):
-    s3.download_file(Bucket=bucket, Key=key, Filename=local_path)
+    s3.download_file(Bucket=bucket, Key=key, Filename=local_path, Config=TRANSFER_CONFIG)
@@ -0,0 +1,150 @@
+# batch_jobs.py
+import io
+import os
+import time
+import queue
+import tarfile
+import zipfile
+import threading
+from collections import OrderedDict
+
+from messages import format_result, new_request_id
+
+
+def extract_uploads(files):
+    """Yield (name, stream) for every uploaded image, unpacking zip/tar archives."""
+    for f in files:
+        lower = f.filename.lower()
+        if lower.endswith(".zip"):
+            with zipfile.ZipFile(f.stream) as zf:
+                for info in zf.infolist():
+                    name = os.path.basename(info.filename)
+                    if not info.is_dir() and name and not name.startswith("."):
+                        yield name, io.BytesIO(zf.read(info))
+        elif lower.endswith((".tar", ".tar.gz", ".tgz")):
+            with tarfile.open(fileobj=f.stream, mode="r:*") as tf:
+                for member in tf.getmembers():
+                    name = os.path.basename(member.name)
+                    if member.isfile() and name and not name.startswith("."):
+                        yield name, io.BytesIO(tf.extractfile(member).read())
+        else:
+            yield f.filename, f.stream
+
+
+class BatchJob:
+    """Tracks the images of one /predict_batch submission.
+
+    Each image is stored under ``<job id>/<name>`` so jobs never collide with
+    each other or with interactive uploads. Completions are also pushed onto
+    an internal queue so a streaming response can emit them as they arrive.
+    """
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.created = time.time()
+        self.keys = OrderedDict()
+        self.labels = {}
+        self.errors = {}
+        self.request_ids = {}
+        self._updates = queue.Queue()
+        self._lock = threading.Lock()
+
+    def add(self, name) -> str:
+        with self._lock:
+            unique, n = name, 1
+            while unique in self.keys:
+                base, ext = os.path.splitext(name)
+                unique, n = f"{base}_{n}{ext}", n + 1
+            self.keys[unique] = f"{self.id}/{unique}"
+            return unique
+
+    def complete(self, name, label):
+        with self._lock:
+            if name in self.labels or name in self.errors:
+                return
+            self.labels[name] = label
+        self._updates.put(name)
+
+    def fail(self, name, error):
+        with self._lock:
+            if name in self.labels or name in self.errors:
+                return
+            self.errors[name] = error
+        self._updates.put(name)
+
+    def pending(self):
+        with self._lock:
+            return [n for n in self.keys if n not in self.labels and n not in self.errors]
+
+    @property
+    def done(self):
+        return not self.pending()
+
+    def record(self, name) -> dict:
+        if name in self.labels:
+            return {"image": name, "result": format_result(name, self.labels[name])}
+        if name in self.errors:
+            return {"image": name, "error": self.errors[name]}
+        return {"image": name, "status": "pending"}
+
+    def updates(self, timeout, poll=None):
+        """Yield records as images finish, then timeouts for any left over.
+
+        ``poll(key)`` is called for pending images about once a second when
+        results are not pushed (no response-queue dispatcher).
+        """
+        deadline = time.time() + timeout
+        emitted = 0
+        while emitted < len(self.keys) and time.time() < deadline:
+            try:
+                name = self._updates.get(timeout=1)
+            except queue.Empty:
+                if poll is not None:
+                    for pending in self.pending():
+                        label = poll(self.keys[pending])
+                        if label is not None:
+                            self.complete(pending, label)
+                continue
+            emitted += 1
+            yield self.record(name)
+        # Not recorded as failures: a late result still shows up in summary().
+        for name in self.pending():
+            yield {"image": name, "error": "timeout"}
+
+    def summary(self, include_results=True) -> dict:
+        pending = self.pending()
+        status = "running" if pending else "done"
+        data = {"job_id": self.id, "status": status, "total": len(self.keys),
+                "completed": len(self.keys) - len(pending)}
+        if include_results:
+            data["results"] = [self.record(n) for n in self.keys]
+        return data
+
+
+class JobStore:
+    """Bounded in-memory registry of batch jobs; the oldest are evicted first.
+
+    ``on_evict(job)`` is called for every evicted job.
+    """
+
+    def __init__(self, max_jobs, on_evict=None):
+        self.max_jobs = max_jobs
+        self.on_evict = on_evict
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self) -> BatchJob:
+        job = BatchJob(new_request_id())
+        evicted = []
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                evicted.append(self._jobs.popitem(last=False)[1])
+        if self.on_evict:
+            for old in evicted:
+                self.on_evict(old)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
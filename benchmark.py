@@ -0,0 +1,239 @@
+# benchmark.py
+# Load generator and micro-benchmarks.
+#
+#   python3 benchmark.py load IMAGE_DIR [--url URL] [--concurrency N | --rate R]
+#                                       [--requests N] [--labels FILE]
+#   python3 benchmark.py classify IMAGE_DIR [--batch-sizes 1,4,8] [--threads 1,2,4]
+#   python3 benchmark.py worker IMAGE_DIR [--messages N] [--mode serial|pipeline]
+#
+# `load` writes one row per request to Config.RESULT_CSV. `worker` runs on the
+# in-process backend (STORAGE_BACKEND=local), so it needs no AWS.
+import os
+import csv
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+LOAD_HEADER = ["image", "status", "latency_s", "label", "expected", "correct"]
+
+
+def list_images(image_dir):
+    return sorted(
+        os.path.join(image_dir, f) for f in os.listdir(image_dir)
+        if f.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def load_labels(path):
+    """Expected labels from a CSV of ``image,label`` rows."""
+    if not path:
+        return {}
+    with open(path, newline="") as f:
+        return {row[0]: row[1] for row in csv.reader(f) if len(row) >= 2}
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(name, latencies, elapsed, extra=""):
+    print(f"{name}: n={len(latencies)} throughput={len(latencies) / elapsed:.2f}/s "
+          f"p50={percentile(latencies, 50) * 1000:.1f}ms p95={percentile(latencies, 95) * 1000:.1f}ms "
+          f"p99={percentile(latencies, 99) * 1000:.1f}ms {extra}".rstrip())
+
+
+def check_load_output(path):
+    """Refuse to overwrite a CSV that is not a previous load report, e.g. a
+    bulk_classify run resuming from the same Config.RESULT_CSV."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, newline="") as f:
+        header = next(csv.reader(f), None)
+    if header != LOAD_HEADER:
+        raise SystemExit(f"{path} is not a load report (header {header}); "
+                         f"set RUN_ID to write the report elsewhere")
+
+
+# -------- End-to-end load --------
+def run_load(args):
+    import requests
+    from config import Config
+
+    check_load_output(Config.RESULT_CSV)
+    images = list_images(args.image_dir)
+    expected = load_labels(args.labels)
+    local = threading.local()
+    records = []
+    records_lock = threading.Lock()
+
+    def post(path, scheduled):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        name = os.path.basename(path)
+        status, result = "error", ""
+        try:
+            with open(path, "rb") as f:
+                resp = local.session.post(args.url, files={"myfile": (name, f)}, timeout=args.timeout)
+            status = "ok" if resp.status_code == 200 else ("timeout" if resp.status_code == 504 else str(resp.status_code))
+            result = resp.json().get("result", "") if resp.ok else ""
+        except requests.Timeout:
+            status = "timeout"
+        except Exception as e:
+            result = str(e)
+        # Latency counts from the scheduled start, so a backed-up client
+        # in open-loop mode does not hide queueing delay.
+        latency = time.time() - scheduled
+        label = result.split(",", 1)[1] if "," in result else ""
+        want = expected.get(name)
+        correct = "" if want is None else str(label == want)
+        with records_lock:
+            records.append((name, status, f"{latency:.4f}", label, want or "", correct))
+        return latency
+
+    start = time.time()
+    if args.rate:
+        # Open loop: Poisson arrivals at --rate requests/s.
+        with ThreadPoolExecutor(max_workers=args.max_inflight) as pool:
+            t = start
+            for i in range(args.requests):
+                t += random.expovariate(args.rate)
+                time.sleep(max(0.0, t - time.time()))
+                pool.submit(post, images[i % len(images)], t)
+    else:
+        # Closed loop: --concurrency clients, each sending back to back.
+        counter = iter(range(args.requests))
+        counter_lock = threading.Lock()
+
+        def client():
+            while True:
+                with counter_lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                post(images[i % len(images)], time.time())
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for _ in range(args.concurrency):
+                pool.submit(client)
+    elapsed = time.time() - start
+
+    with open(Config.RESULT_CSV, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(LOAD_HEADER)
+        writer.writerows(records)
+
+    ok = [float(r[2]) for r in records if r[1] == "ok"]
+    timeouts = sum(1 for r in records if r[1] == "timeout")
+    errors = len(records) - len(ok) - timeouts
+    graded = [r for r in records if r[5]]
+    accuracy = f"accuracy={sum(r[5] == 'True' for r in graded) / len(graded):.2%}" if graded else ""
+    summarize("load", ok, elapsed, f"timeouts={timeouts} errors={errors} {accuracy}")
+    print(f"Wrote {len(records)} row(s) to {Config.RESULT_CSV}")
+
+
+# -------- classify() micro-benchmark --------
+def run_classify(args):
+    from classifier.image_classification import (
+        InferenceEngine, get_engine, configure_threads, load_image
+    )
+
+    base = get_engine()
+    images = [load_image(p) for p in list_images(args.image_dir)]
+    print("batch_size,threads,images_per_sec")
+    for threads in [int(t) for t in args.threads.split(",")]:
+        configure_threads(threads)
+        for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+            engine = InferenceEngine(base.model, base.labels, max_batch_size=batch_size)
+            batch = [images[i % len(images)] for i in range(batch_size)]
+            engine.predict_indices(batch)  # warm-up
+            runs = max(1, args.images // batch_size)
+            start = time.time()
+            for _ in range(runs):
+                engine.predict_indices(batch)
+            elapsed = time.time() - start
+            print(f"{batch_size},{threads},{runs * batch_size / elapsed:.2f}")
+
+
+# -------- worker loop micro-benchmark --------
+def run_worker(args):
+    from config import Config
+    from aws_resources import (
+        ensure_bucket, ensure_queue, upload_file_to_s3, send_sqs_messages,
+        receive_sqs_messages, delete_sqs_messages, get_queue_depth
+    )
+    from messages import encode_request
+    import worker
+    from classifier.image_classification import warm_up
+
+    ensure_bucket(Config.INPUT_BUCKET)
+    ensure_bucket(Config.OUTPUT_BUCKET)
+    queue_url = ensure_queue(Config.REQUEST_QUEUE)
+    ensure_queue(Config.RESPONSE_QUEUE)
+    paths = list_images(args.image_dir)
+    for path in paths:
+        upload_file_to_s3(Config.INPUT_BUCKET, os.path.basename(path), path, is_path=True)
+    names = [os.path.basename(paths[i % len(paths)]) for i in range(args.messages)]
+    send_sqs_messages(queue_url, [encode_request(n) for n in names])
+    warm_up()
+
+    start = time.time()
+    if args.mode == "pipeline":
+        threading.Thread(target=worker.PipelineWorker(queue_url).run, daemon=True).start()
+        while get_queue_depth(queue_url) > 0:
+            time.sleep(0.05)
+    else:
+        while True:
+            messages = receive_sqs_messages(queue_url, Config.BATCH_SIZE, wait=0)
+            if not messages:
+                break
+            done = worker.process_messages(messages)
+            if done:
+                delete_sqs_messages(queue_url, done)
+    elapsed = time.time() - start
+    print(f"worker[{args.mode}]: {args.messages} message(s) in {elapsed:.2f}s "
+          f"= {args.messages / elapsed:.2f} msg/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("load")
+    p.add_argument("image_dir")
+    p.add_argument("--url", default="http://localhost:5000/predict")
+    p.add_argument("--concurrency", type=int, default=10)
+    p.add_argument("--rate", type=float, default=0.0, help="open-loop arrivals per second")
+    p.add_argument("--max-inflight", type=int, default=1000)
+    p.add_argument("--requests", type=int, default=100)
+    p.add_argument("--timeout", type=float, default=300)
+    p.add_argument("--labels", help="CSV of image,label for correctness checks")
+
+    p = sub.add_parser("classify")
+    p.add_argument("image_dir")
+    p.add_argument("--batch-sizes", default="1,2,4,8,16")
+    p.add_argument("--threads", default="1,2,4")
+    p.add_argument("--images", type=int, default=64)
+
+    p = sub.add_parser("worker")
+    p.add_argument("image_dir")
+    p.add_argument("--messages", type=int, default=100)
+    p.add_argument("--mode", choices=["serial", "pipeline"], default="serial")
+
+    args = parser.parse_args(argv)
+    if args.cmd == "worker":
+        # Must be set before config/aws_resources are imported.
+        os.environ["STORAGE_BACKEND"] = "local"
+        os.environ.setdefault("SKIP_EXISTING", "false")
+    {"load": run_load, "classify": run_classify, "worker": run_worker}[args.cmd](args)
+
+
+if __name__ == "__main__":
+    main()
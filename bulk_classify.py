@@ -0,0 +1,158 @@
+# bulk_classify.py
+# Offline bulk classification that bypasses the controller and the queues.
+#
+#   python3 bulk_classify.py s3://BUCKET/PREFIX [--shard I/N] [--output CSV]
+#   python3 bulk_classify.py IMAGE_DIR [--shard I/N] [--output CSV]
+#
+# Rows (image,label,confidence,tier) are appended to Config.RESULT_CSV as each
+# batch finishes, and a rerun skips images already in the file, so an
+# interrupted run resumes where it stopped. To split a dataset across
+# machines, run shard 0/N ... N-1/N on each; keys are assigned by hash, so the
+# shards are disjoint without any coordination.
+import os
+import csv
+import time
+import zlib
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from create_log import init_logging
+
+log = init_logging("bulk_classify", "bulk_classify.log")
+from config import Config
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+HEADER = ["image", "label", "confidence", "tier"]
+
+
+def in_shard(key, shard, num_shards):
+    return num_shards <= 1 or zlib.crc32(key.encode("utf-8")) % num_shards == shard
+
+
+def done_keys(path):
+    """Images that already have a row in ``path``.
+
+    Raises ValueError for a file written by something else (e.g. benchmark.py
+    load, which shares Config.RESULT_CSV), rather than resuming from it.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header != HEADER:
+            raise ValueError(f"{path} is not a bulk_classify result file (header {header}); "
+                             f"pass --output to choose another file")
+        return {row[0] for row in reader if row}
+
+
+def parse_source(source):
+    """Return (list_keys, open_key) for an s3://bucket/prefix URL or a directory."""
+    if source.startswith("s3://"):
+        from aws_resources import iter_object_keys, download_to_buffer
+
+        bucket, _, prefix = source[len("s3://"):].partition("/")
+        return (
+            lambda: (k for k in iter_object_keys(bucket, prefix) if k.lower().endswith(IMAGE_EXTENSIONS)),
+            lambda key: download_to_buffer(bucket, key),
+        )
+
+    def list_local():
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.relpath(os.path.join(root, name), source).replace(os.sep, "/")
+
+    return list_local, lambda key: open(os.path.join(source, key), "rb")
+
+
+def prefetch(pool, keys, fetch, depth):
+    """Yield (key, future) in order while keeping ``depth`` fetches in flight."""
+    pending = deque()
+    for key in keys:
+        pending.append((key, pool.submit(fetch, key)))
+        if len(pending) >= depth:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
+def run(source, output, shard=0, num_shards=1, batch_size=32, threads=Config.FETCH_THREADS * 4):
+    from classifier.image_classification import (
+        classify_batch_detailed, load_image, configure_threads, warm_up
+    )
+
+    configure_threads(Config.TORCH_THREADS)
+    warm_up()
+    list_keys, open_key = parse_source(source)
+    skip = done_keys(output)
+    log.info(f"Bulk run over {source} (shard {shard}/{num_shards}), {len(skip)} image(s) already done")
+
+    def fetch(key):
+        with open_key(key) as f:
+            return load_image(f)
+
+    keys = (k for k in list_keys() if k not in skip and in_shard(k, shard, num_shards))
+    new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+    processed = failed = 0
+    start = time.time()
+    with open(output, "a", newline="") as out, \
+            ThreadPoolExecutor(max_workers=threads, thread_name_prefix="bulk-fetch") as pool:
+        writer = csv.writer(out)
+        if new_file:
+            writer.writerow(HEADER)
+
+        def flush(names, images):
+            predictions = classify_batch_detailed(images)
+            writer.writerows([name, p["label"], p["confidence"], p["tier"]]
+                             for name, p in zip(names, predictions))
+            out.flush()
+
+        names, images = [], []
+        for key, future in prefetch(pool, keys, fetch, depth=2 * batch_size + threads):
+            try:
+                image = future.result()
+            except Exception as e:
+                # No row is written, so the next run retries this image.
+                log.error(f"Failed to load {key}: {e}")
+                failed += 1
+                continue
+            names.append(key)
+            images.append(image)
+            if len(images) == batch_size:
+                flush(names, images)
+                processed += len(images)
+                names, images = [], []
+                if processed % (batch_size * 50) == 0:
+                    log.info(f"{processed} image(s) classified, {processed / (time.time() - start):.1f} img/s")
+        if images:
+            flush(names, images)
+            processed += len(images)
+
+    elapsed = time.time() - start
+    log.info(f"Bulk run finished: {processed} classified, {failed} failed in {elapsed:.1f}s")
+    print(f"Classified {processed} image(s) ({failed} failed) in {elapsed:.1f}s -> {output}")
+    return processed, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify an S3 prefix or a local directory offline.")
+    parser.add_argument("source", help="s3://bucket/prefix or a local directory")
+    parser.add_argument("--output", default=Config.RESULT_CSV)
+    parser.add_argument("--shard", default="0/1", help="I/N: this machine's share of the key space")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=Config.FETCH_THREADS * 4,
+                        help="concurrent downloads/decodes")
+    args = parser.parse_args(argv)
+
+    shard, _, num_shards = args.shard.partition("/")
+    try:
+        done_keys(args.output)
+    except ValueError as e:
+        parser.error(str(e))
+    run(args.source, args.output, int(shard), int(num_shards or 1), args.batch_size, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+from typing import Any, Callable, Dict, List
+import os
+import sys
+import torch
+import torchvision.models as models
+
+from config import Config
+
+BACKENDS = ("eager", "torchscript", "int8", "onnx")
+
+
+def build_torchvision(arch: str, cache_dir: str = Config.MODEL_CACHE_DIR):
+    """A pretrained torchvision model with weights from the local cache,
+    downloading them only once."""
+    builder = getattr(models, arch)
+    path = os.path.join(cache_dir, f"{arch}.pth")
+    if os.path.exists(path):
+        model = builder()
+        model.load_state_dict(torch.load(path, map_location="cpu"))
+    else:
+        model = builder(pretrained=True)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        torch.save(model.state_dict(), tmp_path)
+        os.replace(tmp_path, path)
+    model.eval()
+    return model
+
+
+def build_eager(cache_dir: str = Config.MODEL_CACHE_DIR):
+    return build_torchvision("resnet18", cache_dir)
+
+
+def _example_input(batch_size: int = 1) -> torch.Tensor:
+    return torch.randn(batch_size, 3, Config.IMAGE_SIZE, Config.IMAGE_SIZE)
+
+
+def _export_torchscript(path: str):
+    with torch.inference_mode():
+        traced = torch.jit.trace(build_eager(), _example_input())
+    torch.jit.save(torch.jit.freeze(traced), path)
+
+
+def _export_int8(path: str):
+    # Statically quantized ResNet-18 with fused conv/bn/relu; the weights ship
+    # with torchvision so no calibration pass is needed here.
+    from torchvision.models import quantization as qmodels
+
+    model = qmodels.resnet18(pretrained=True, quantize=True)
+    model.eval()
+    with torch.inference_mode():
+        traced = torch.jit.trace(model, _example_input())
+    torch.jit.save(torch.jit.freeze(traced), path)
+
+
+def _export_onnx(path: str):
+    torch.onnx.export(
+        build_eager(), _example_input(), path,
+        input_names=["input"], output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=13,
+    )
+
+
+class OnnxModel:
+    """Callable wrapper exposing an ONNX Runtime session like a torch module."""
+
+    def __init__(self, path: str):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("MODEL_BACKEND=onnx requires the onnxruntime package") from e
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if Config.TORCH_THREADS > 0:
+            options.intra_op_num_threads = Config.TORCH_THREADS
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        outputs = self.session.run(None, {"input": batch.contiguous().numpy()})
+        return torch.from_numpy(outputs[0])
+
+    def to(self, *args, **kwargs):
+        return self
+
+    def share_memory(self):
+        return self
+
+
+_EXPORTERS: Dict[str, Callable[[str], None]] = {
+    "torchscript": _export_torchscript,
+    "int8": _export_int8,
+    "onnx": _export_onnx,
+}
+_FILENAMES = {
+    "torchscript": "resnet18_torchscript.pt",
+    "int8": "resnet18_int8.pt",
+    "onnx": "resnet18.onnx",
+}
+
+
+def artifact_path(backend: str, cache_dir: str = Config.MODEL_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, _FILENAMES[backend])
+
+
+def load_model(backend: str = Config.MODEL_BACKEND, cache_dir: str = Config.MODEL_CACHE_DIR):
+    """Return a callable model for ``backend``, exporting it to disk on first use."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend {backend!r}; expected one of {BACKENDS}")
+    if backend == "eager":
+        return build_eager(cache_dir)
+
+    path = artifact_path(backend, cache_dir)
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        _EXPORTERS[backend](tmp_path)
+        os.replace(tmp_path, path)
+
+    if backend == "onnx":
+        return OnnxModel(path)
+    model = torch.jit.load(path)
+    model.eval()
+    return model
+
+
+def check_agreement(backend: str, samples: List[Any]) -> float:
+    """Top-1 agreement of ``backend`` against the eager model on ``samples``."""
+    from classifier.image_classification import InferenceEngine, load_image
+
+    images = [load_image(s) for s in samples]
+    if not images:
+        return 1.0
+    reference = InferenceEngine(build_eager(), [], channels_last=False).predict_indices(images)
+    candidate = InferenceEngine(load_model(backend), [], channels_last=False).predict_indices(images)
+    matches = sum(1 for a, b in zip(reference, candidate) if a == b)
+    return matches / len(images)
+
+
+def publish_artifacts(backends: List[str], bucket: str = Config.ARTIFACT_BUCKET,
+                      prefix: str = Config.ARTIFACT_PREFIX, cache_dir: str = Config.MODEL_CACHE_DIR) -> List[str]:
+    """Build ``backends`` and upload the model cache to s3://bucket/prefix,
+    where workers' sync_artifacts picks it up at boot. Returns the keys written."""
+    from aws_resources import upload_file_to_s3
+
+    if not bucket:
+        raise ValueError("ARTIFACT_BUCKET is not set")
+    for backend in backends:
+        load_model(backend, cache_dir)
+    if Config.CASCADE:
+        build_torchvision(Config.CASCADE_SMALL_MODEL, cache_dir)
+
+    keys = []
+    for name in sorted(os.listdir(cache_dir)):
+        local_path = os.path.join(cache_dir, name)
+        if ".tmp" in name or not os.path.isfile(local_path):
+            continue
+        if not upload_file_to_s3(bucket, prefix + name, local_path, is_path=True):
+            raise RuntimeError(f"Failed to upload {local_path}")
+        keys.append(prefix + name)
+    return keys
+
+
+if __name__ == "__main__":
+    # python -m classifier.backends <backend> [image ...]
+    # python -m classifier.backends publish [backend ...]
+    if len(sys.argv) > 1 and sys.argv[1] == "publish":
+        for key in publish_artifacts(sys.argv[2:] or [Config.MODEL_BACKEND]):
+            print(f"published s3://{Config.ARTIFACT_BUCKET}/{key}")
+        sys.exit(0)
+    name = sys.argv[1] if len(sys.argv) > 1 else Config.MODEL_BACKEND
+    paths = sys.argv[2:]
+    load_model(name)
+    print(f"{name} artifact ready")
+    if paths:
+        print(f"top-1 agreement with eager on {len(paths)} image(s): {check_agreement(name, paths):.2%}")
@@ -0,0 +1,105 @@
+from typing import Any, Dict, List
+import sys
+import time
+
+from config import Config
+from classifier.backends import build_torchvision
+from metrics import counter
+
+
+class CascadeEngine:
+    """Confidence-gated two-tier classifier.
+
+    Every image goes through the cheap ``small`` engine first; only those
+    whose top-1 softmax confidence is below ``threshold`` are re-run through
+    the ``large`` engine. Both tiers share the same preprocessing, so each
+    image is decoded and cropped once.
+    """
+
+    def __init__(self, small, large, threshold: float = Config.CASCADE_THRESHOLD):
+        self.small = small
+        self.large = large
+        self.threshold = threshold
+        self.preprocessor = large.preprocessor
+        self.max_batch_size = large.max_batch_size
+        self.labels = large.labels
+
+    @property
+    def engines(self):
+        return [self.small, self.large]
+
+    @property
+    def model(self):
+        return self.large.model
+
+    def classify_detailed(self, paths_or_images: List[Any]) -> List[Dict[str, Any]]:
+        images = [self.preprocessor.prepare(item) for item in paths_or_images]
+        results = [{"label": self.labels[i], "confidence": round(c, 4), "tier": "small"}
+                   for i, c in self.small.predict(images)]
+
+        unsure = [n for n, r in enumerate(results) if r["confidence"] < self.threshold]
+        if unsure:
+            for n, (i, c) in zip(unsure, self.large.predict([images[n] for n in unsure])):
+                results[n] = {"label": self.labels[i], "confidence": round(c, 4), "tier": "full"}
+
+        counter("classify_cascade_images_total", "Images seen by the cascade").inc(len(images))
+        counter("classify_cascade_escalated_total", "Images escalated to the full model").inc(len(unsure))
+        return results
+
+    def classify_batch(self, paths_or_images: List[Any]) -> List[str]:
+        if not paths_or_images:
+            return []
+        return [r["label"] for r in self.classify_detailed(paths_or_images)]
+
+    def predict_indices(self, images):
+        return self.large.predict_indices(images)
+
+
+def build_cascade(large, small_arch: str = Config.CASCADE_SMALL_MODEL,
+                  threshold: float = Config.CASCADE_THRESHOLD) -> CascadeEngine:
+    """Wrap an existing full-model engine with a small first tier."""
+    from classifier.image_classification import InferenceEngine
+
+    small = InferenceEngine(build_torchvision(small_arch), large.labels,
+                            max_batch_size=large.max_batch_size, preprocessor=large.preprocessor)
+    return CascadeEngine(small, large, threshold)
+
+
+def evaluate(cascade: CascadeEngine, samples: List[Any]) -> Dict[str, float]:
+    """Escalation rate, agreement with the full model and time per image."""
+    images = [cascade.preprocessor.prepare(s) for s in samples]
+    if not images:
+        return {}
+
+    start = time.perf_counter()
+    full = cascade.large.predict_indices(images)
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = cascade.classify_detailed(images)
+    cascade_time = time.perf_counter() - start
+
+    agree = sum(1 for r, i in zip(results, full) if r["label"] == cascade.labels[i])
+    escalated = sum(1 for r in results if r["tier"] == "full")
+    return {
+        "images": len(images),
+        "escalation_rate": escalated / len(images),
+        "agreement": agree / len(images),
+        "full_ms_per_image": 1000 * full_time / len(images),
+        "cascade_ms_per_image": 1000 * cascade_time / len(images),
+    }
+
+
+if __name__ == "__main__":
+    # python -m classifier.cascade [--threshold T] image ...
+    from classifier.image_classification import _load_model_and_labels, InferenceEngine
+    import classifier.image_classification as ic
+
+    args = sys.argv[1:]
+    threshold = Config.CASCADE_THRESHOLD
+    if args[:1] == ["--threshold"]:
+        threshold, args = float(args[1]), args[2:]
+    _load_model_and_labels()
+    engine = build_cascade(InferenceEngine(ic._model, ic._labels), threshold=threshold)
+    for key, value in evaluate(engine, args).items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
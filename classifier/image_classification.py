@@ -1,35 +1,174 @@
 from typing import Any, Optional, Union, Tuple, List, Dict
+import os
 import sys
 import json
+import threading
 from PIL import Image
-import torchvision.transforms as transforms
-import torchvision.models as models
 import torch
 
+if __package__ in (None, ""):
+    # Run as a script (python3 classifier/image_classification.py img.jpg):
+    # put the repo root on the path for config, metrics and the package.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from classifier.preprocessing import Preprocessor
+from classifier.backends import load_model
+from metrics import span, histogram, SIZE_BUCKETS
+
 _model = None
 _labels = None
+_engine = None
+_preprocessor = None
+_engine_lock = threading.Lock()
 
 
 def _load_model_and_labels():
     global _model, _labels
     if _model is None:
-        _model = models.resnet18(pretrained=True)
-        _model.eval()
+        _model = load_model(Config.MODEL_BACKEND)
     if _labels is None:
         with open("classifier/imagenet-labels.json", "r") as f:
             _labels = json.load(f)
 
 
+def load_image(item) -> Image.Image:
+    """Decode a path, file-like object or PIL image and crop it to model size."""
+    return get_preprocessor().prepare(item)
+
+
+class InferenceEngine:
+    """Runs batched, gradient-free forward passes over a loaded model.
+
+    Prepared images are normalized straight into one preallocated input
+    buffer and classified in a single forward pass; labels come back in
+    input order.
+    """
+
+    def __init__(self, model, labels: List[str], max_batch_size: int = Config.BATCH_SIZE,
+                 preprocessor: Optional[Preprocessor] = None, channels_last: bool = Config.CHANNELS_LAST):
+        self.model = model
+        self.labels = labels
+        self.max_batch_size = max(1, max_batch_size)
+        self.preprocessor = preprocessor or get_preprocessor()
+        self._buffer = torch.empty((self.max_batch_size,) + self.preprocessor.shape)
+        if channels_last:
+            self.model = self.model.to(memory_format=torch.channels_last)
+            self._buffer = self._buffer.contiguous(memory_format=torch.channels_last)
+        self._lock = threading.Lock()
+
+    @property
+    def engines(self) -> List["InferenceEngine"]:
+        return [self]
+
+    def _forward(self, images: List[Image.Image]) -> List[Tuple[int, float]]:
+        batch = self._buffer[:len(images)]
+        with span("classify_preprocess_seconds", "Normalizing a batch into the input buffer"):
+            for i, img in enumerate(images):
+                self.preprocessor.fill(img, batch[i])
+        with span("classify_forward_seconds", "Model forward pass per batch"):
+            with torch.inference_mode():
+                outputs = self.model(batch)
+        histogram("classify_batch_size", "Images per forward pass", SIZE_BUCKETS).observe(len(images))
+        confidence, index = outputs.softmax(1).max(1)
+        return list(zip(index.tolist(), confidence.tolist()))
+
+    def predict(self, images: List[Image.Image]) -> List[Tuple[int, float]]:
+        """Top-1 (class index, softmax confidence) for prepared images."""
+        preds: List[Tuple[int, float]] = []
+        with self._lock:
+            for start in range(0, len(images), self.max_batch_size):
+                preds.extend(self._forward(images[start:start + self.max_batch_size]))
+        return preds
+
+    def predict_indices(self, images: List[Image.Image]) -> List[int]:
+        return [index for index, _ in self.predict(images)]
+
+    def classify_detailed(self, paths_or_images: List[Any]) -> List[Dict[str, Any]]:
+        images = [self.preprocessor.prepare(item) for item in paths_or_images]
+        return [{"label": self.labels[i], "confidence": round(c, 4), "tier": "full"}
+                for i, c in self.predict(images)]
+
+    def classify_batch(self, paths_or_images: List[Any]) -> List[str]:
+        if not paths_or_images:
+            return []
+        images = [self.preprocessor.prepare(item) for item in paths_or_images]
+        return [self.labels[p] for p in self.predict_indices(images)]
+
+
+def get_preprocessor() -> Preprocessor:
+    global _preprocessor
+    if _preprocessor is None:
+        _preprocessor = Preprocessor(Config.RESIZE_SIZE, Config.IMAGE_SIZE)
+    return _preprocessor
+
+
+def get_engine():
+    """The process-wide engine: a plain InferenceEngine, or a CascadeEngine
+    when Config.CASCADE is set."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _load_model_and_labels()
+                _engine = InferenceEngine(_model, _labels)
+                if Config.CASCADE:
+                    from classifier.cascade import build_cascade
+
+                    _engine = build_cascade(_engine)
+    return _engine
+
+
+def warm_up(iterations: int = 2):
+    """Load the model and run full-size dummy batches so the first real
+    message does not pay for lazy initialisation."""
+    engine = get_engine()
+    for e in engine.engines:
+        crop = e.preprocessor.crop
+        dummy = [Image.new("RGB", (crop, crop))] * e.max_batch_size
+        for _ in range(iterations):
+            e.predict_indices(dummy)
+    return engine
+
+
+def configure_threads(num_threads: int):
+    """Pin PyTorch intra-op threading; call before the first forward pass."""
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Inter-op pool is already running in this process; keep it.
+            pass
+
+
+def share_model():
+    """Load the engine and move its weights into shared memory.
+
+    Processes forked afterwards map the same weight pages instead of each
+    holding a private copy of the model.
+    """
+    engine = get_engine()
+    for e in engine.engines:
+        if hasattr(e.model, "share_memory"):
+            e.model.share_memory()
+    return engine
+
+
+def classify_batch(paths_or_images: List[Any]) -> List[str]:
+    return get_engine().classify_batch(paths_or_images)
+
+
+def classify_batch_detailed(paths_or_images: List[Any]) -> List[Dict[str, Any]]:
+    """Like classify_batch, with the softmax confidence and answering tier."""
+    return get_engine().classify_detailed(paths_or_images)
+
+
 def classify(image_path: str) -> str:
-    _load_model_and_labels()
-    img = Image.open(image_path).convert("RGB")
-    tensor = transforms.ToTensor()(img).unsqueeze(0)
-    outputs = _model(tensor)
-    _, pred = torch.max(outputs, 1)
-    return _labels[int(pred.item())]
+    return classify_batch([image_path])[0]
 
 
 if __name__ == "__main__":
-    path = sys.argv[1]
-    label = classify(path)
-    print(f"{path.split('/')[-1]},{label}")
+    paths = sys.argv[1:]
+    for path, label in zip(paths, classify_batch(paths)):
+        print(f"{path.split('/')[-1]},{label}")
@@ -0,0 +1,66 @@
+from typing import Any, Tuple
+from PIL import Image
+import torch
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+def decode_image(item: Any, min_size: int) -> Image.Image:
+    """Decode a path, file-like object or PIL image to RGB.
+
+    JPEGs are decoded in draft mode, which lets libjpeg scale by 1/2, 1/4 or
+    1/8 while decoding as long as both sides stay at least ``min_size``.
+    """
+    if isinstance(item, Image.Image):
+        img = item
+    else:
+        img = Image.open(item)
+        if img.format == "JPEG":
+            img.draft("RGB", (min_size, min_size))
+    return img.convert("RGB")
+
+
+def center_crop_box(size: Tuple[int, int], resize: int, crop: int) -> Tuple[float, float, float, float]:
+    """Source box that a resize-shorter-side-then-center-crop would keep."""
+    w, h = size
+    side = min(w, h) * crop / resize
+    left = (w - side) / 2
+    top = (h - side) / 2
+    return left, top, left + side, top + side
+
+
+class Preprocessor:
+    """Fixed-size ImageNet preprocessing: resize, center crop, normalize.
+
+    ``prepare`` does the PIL work (decode, resize and crop in one resample)
+    and is safe to run on I/O threads; ``fill`` normalizes a prepared image
+    straight into a slot of a preallocated input tensor.
+    """
+
+    def __init__(self, resize: int = 256, crop: int = 224):
+        self.resize = resize
+        self.crop = crop
+        self.mean = torch.tensor(IMAGENET_MEAN).view(3, 1, 1) * 255
+        self.std = torch.tensor(IMAGENET_STD).view(3, 1, 1) * 255
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return 3, self.crop, self.crop
+
+    def prepare(self, item: Any) -> Image.Image:
+        if isinstance(item, Image.Image) and item.mode == "RGB" and item.size == (self.crop, self.crop):
+            return item
+        img = decode_image(item, self.resize)
+        box = center_crop_box(img.size, self.resize, self.crop)
+        return img.resize((self.crop, self.crop), Image.BILINEAR, box=box)
+
+    def fill(self, img: Image.Image, out: torch.Tensor):
+        data = torch.frombuffer(bytearray(img.tobytes()), dtype=torch.uint8)
+        out.copy_(data.view(self.crop, self.crop, 3).permute(2, 0, 1))
+        out.sub_(self.mean).div_(self.std)
+
+    def to_tensor(self, item: Any) -> torch.Tensor:
+        out = torch.empty(self.shape)
+        self.fill(self.prepare(item), out)
+        return out
@@ -7,12 +7,39 @@ load_dotenv()
 
 class Config:
     REGION = os.getenv("REGION")
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "aws")
+    LOCAL_WORKERS = int(os.getenv("LOCAL_WORKERS", 1))
 
     INPUT_BUCKET = os.getenv("INPUT_BUCKET")
     OUTPUT_BUCKET = os.getenv("OUTPUT_BUCKET")
 
     REQUEST_QUEUE = os.getenv("REQUEST_QUEUE")
     RESPONSE_QUEUE = os.getenv("RESPONSE_QUEUE")
+    # Low-priority lane for bulk work; interactive /predict stays on REQUEST_QUEUE.
+    BULK_QUEUE = os.getenv("BULK_QUEUE")
+    REQUEST_LANES = [q for q in (REQUEST_QUEUE, BULK_QUEUE) if q]
+    LANE_POLICY = os.getenv("LANE_POLICY", "strict")
+    LANE_WEIGHTS = [int(w) for w in os.getenv("LANE_WEIGHTS", "4,1").split(",")]
+    LANE_TOP_WAIT = int(os.getenv("LANE_TOP_WAIT", 1))
+    # Queue names ending in .fifo are FIFO queues; anything else is standard.
+    MESSAGE_GROUPS = int(os.getenv("MESSAGE_GROUPS", 64))
+    VISIBILITY_TIMEOUT = int(os.getenv("VISIBILITY_TIMEOUT", 30))
+    MAX_VISIBILITY_HOLD = int(os.getenv("MAX_VISIBILITY_HOLD", 900))
+    SKIP_EXISTING = os.getenv("SKIP_EXISTING", "true").lower() == "true"
+
+    # Shared boto3 clients (aws_clients.py). The pool should cover the
+    # busiest thread pool that talks to AWS, or requests queue for sockets.
+    AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", 64))
+    AWS_TCP_KEEPALIVE = os.getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+    AWS_CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", 5))
+    AWS_READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", 30))
+    AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "adaptive")
+    AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", 5))
+    S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", 64 * 1024 * 1024))
+    S3_TRANSFER_THREADS = int(os.getenv("S3_TRANSFER_THREADS", 1))
+    DELETE_THREADS = int(os.getenv("DELETE_THREADS", 8))
+    # >0: shutdown sets a lifecycle expiry on the buckets instead of deleting.
+    CLEANUP_EXPIRY_DAYS = int(os.getenv("CLEANUP_EXPIRY_DAYS", 0))
 
     INSTANCE_AMI = os.getenv("INSTANCE_AMI")
     INSTANCE_TYPE = os.getenv("INSTANCE_TYPE")
@@ -22,15 +49,56 @@ class Config:
     MIN_WORKERS = int(os.getenv("MIN_WORKERS", 1))
     MAX_WORKERS = int(os.getenv("MAX_WORKERS", 20))
     WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", 60))
+    RESULT_DELIVERY = os.getenv("RESULT_DELIVERY", "queue")
+    # "process": each controller process gets its own response queue and
+    # names it in its requests; "shared": all controllers read RESPONSE_QUEUE.
+    RESPONSE_ROUTING = os.getenv("RESPONSE_ROUTING", "process")
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 10000))
+    RESULT_CACHE_PERSIST = os.getenv("RESULT_CACHE_PERSIST", "false").lower() == "true"
+    MAX_BATCH_JOBS = int(os.getenv("MAX_BATCH_JOBS", 1000))
+    BATCH_UPLOAD_THREADS = int(os.getenv("BATCH_UPLOAD_THREADS", 16))
+    ASYNC_WEB_PORT = int(os.getenv("ASYNC_WEB_PORT", 5001))
+    ASYNC_IO_THREADS = int(os.getenv("ASYNC_IO_THREADS", 32))
     TASKS_PER_WORKER = int(os.getenv("TASKS_PER_WORKER", 60))
     SCALE_OUT_THRESHOLD = int(os.getenv("SCALE_OUT_THRESHOLD", 10))
     SCALE_IN_THRESHOLD = int(os.getenv("SCALE_IN_THRESHOLD", 2))
     CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", 30))
     SCALE_INTERVAL = int(os.getenv("SCALE_INTERVAL", 5))
+    SCALING_POLICY = os.getenv("SCALING_POLICY", "threshold")
+    WORKER_SERVICE_RATE = float(os.getenv("WORKER_SERVICE_RATE", 1.0))
+    TARGET_LATENCY = float(os.getenv("TARGET_LATENCY", 30))
+    RATE_WINDOW = float(os.getenv("RATE_WINDOW", 60))
+    SCALE_OUT_COOLDOWN = float(os.getenv("SCALE_OUT_COOLDOWN", 30))
+    SCALE_IN_COOLDOWN = float(os.getenv("SCALE_IN_COOLDOWN", 180))
+    LAUNCH_PARAMS_TTL = float(os.getenv("LAUNCH_PARAMS_TTL", 3600))
+    HEARTBEAT_BUCKET = os.getenv("HEARTBEAT_BUCKET", os.getenv("OUTPUT_BUCKET"))
+    HEARTBEAT_PREFIX = os.getenv("HEARTBEAT_PREFIX", "heartbeats/")
+    HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", 10))
+    DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", 120))
+    WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 9100))
+    SCALER_TRACE = os.getenv("SCALER_TRACE")
     WORKER_TAG = str(os.getenv("WORKER_TAG", 'app-instance'))
     SECURITY_GROUP_NAME = str(os.getenv("SECURITY_GROUP_NAME"))
     IAM_INSTANCE_PROFILE = str(os.getenv("IAM_INSTANCE_PROFILE"))
     KEY_NAME = str(os.getenv("KEY_NAME"))
 
+    BATCH_SIZE = int(os.getenv("BATCH_SIZE", 10))
+    MODEL_BACKEND = os.getenv("MODEL_BACKEND", "eager")
+    MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "model_cache")
+    ARTIFACT_BUCKET = os.getenv("ARTIFACT_BUCKET")
+    ARTIFACT_PREFIX = os.getenv("ARTIFACT_PREFIX", "model_cache/")
+    CASCADE = os.getenv("CASCADE", "false").lower() == "true"
+    CASCADE_SMALL_MODEL = os.getenv("CASCADE_SMALL_MODEL", "mobilenet_v3_small")
+    CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", 0.6))
+    IMAGE_SIZE = int(os.getenv("IMAGE_SIZE", 224))
+    RESIZE_SIZE = int(os.getenv("RESIZE_SIZE", 256))
+    CHANNELS_LAST = os.getenv("CHANNELS_LAST", "false").lower() == "true"
+    WORKER_MODE = os.getenv("WORKER_MODE", "serial")
+    FETCH_THREADS = int(os.getenv("FETCH_THREADS", 4))
+    PIPELINE_DEPTH = int(os.getenv("PIPELINE_DEPTH", 2))
+    WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", 1))
+    TORCH_THREADS = int(os.getenv("TORCH_THREADS", 0))
+    MAX_INMEMORY_BYTES = int(os.getenv("MAX_INMEMORY_BYTES", 16 * 1024 * 1024))
+
     RUN_ID = os.getenv("RUN_ID", "default")
     RESULT_CSV = f"result_{RUN_ID}.csv"
@@ -0,0 +1,150 @@
+# heartbeat.py
+# Worker liveness/load reports and drain requests, stored as small S3 objects:
+#   <prefix><instance>/<pid>.json   one heartbeat per worker process
+#   <prefix><instance>/drain        written by the scaler to request a drain
+import os
+import json
+import time
+import socket
+import threading
+from create_log import init_logging
+
+log = init_logging("heartbeat", "heartbeat.log")
+from config import Config
+from aws_resources import (
+    upload_file_to_s3, get_object_text, list_objects_in_s3,
+    object_exists, delete_keys, iter_object_keys, get_instance_id
+)
+
+
+def worker_instance_id():
+    return get_instance_id() or socket.gethostname()
+
+
+class Heartbeat:
+    """Tracks this process's load and publishes it every ``interval`` seconds.
+
+    Workers call ``begin``/``end`` around messages they hold and ``park``
+    once they have stopped receiving because a drain was requested.
+    """
+
+    def __init__(self, instance_id=None, bucket=Config.HEARTBEAT_BUCKET,
+                 prefix=Config.HEARTBEAT_PREFIX, interval=Config.HEARTBEAT_INTERVAL,
+                 service_rate=None):
+        self.instance_id = instance_id
+        self.service_rate = service_rate
+        self.bucket = bucket
+        self.prefix = prefix
+        self.interval = interval
+        self.in_flight = 0
+        self.processed = 0
+        self.last_activity = time.time()
+        self.draining = threading.Event()
+        self.parked = False
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self, n=1):
+        with self._lock:
+            self.in_flight += n
+            self.last_activity = time.time()
+
+    def end(self, n=1, processed=0):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - n)
+            self.processed += processed
+            self.last_activity = time.time()
+
+    def park(self):
+        self.parked = True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "instance": self.instance_id,
+                "pid": os.getpid(),
+                "timestamp": time.time(),
+                "busy": self.in_flight > 0,
+                "in_flight": self.in_flight,
+                "processed": self.processed,
+                "last_activity": self.last_activity,
+                "draining": self.draining.is_set(),
+                "drained": self.parked and self.in_flight == 0,
+                "service_rate": self.service_rate() if self.service_rate else None,
+            }
+
+    def publish(self):
+        key = f"{self.prefix}{self.instance_id}/{os.getpid()}.json"
+        upload_file_to_s3(self.bucket, key, json.dumps(self.snapshot()))
+
+    def _run(self):
+        drain_key = f"{self.prefix}{self.instance_id}/drain"
+        while True:
+            try:
+                if not self.draining.is_set() and object_exists(self.bucket, drain_key):
+                    log.info("Drain requested; no longer taking new messages.")
+                    self.draining.set()
+                self.publish()
+            except Exception as e:
+                log.warning(f"Heartbeat failed: {e}")
+            time.sleep(self.interval)
+
+    def start(self):
+        if not self.bucket:
+            log.info("No heartbeat bucket configured; heartbeats disabled.")
+            return self
+        if self.instance_id is None:
+            self.instance_id = worker_instance_id()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+            self._thread.start()
+        return self
+
+
+def read_heartbeats(bucket=Config.HEARTBEAT_BUCKET, prefix=Config.HEARTBEAT_PREFIX,
+                    max_age=None) -> dict:
+    """Per-instance load, aggregated over its worker processes.
+
+    Heartbeats older than ``max_age`` seconds (default: three intervals) are
+    ignored and deleted, so beats left by terminated instances and restarted
+    pool processes do not pile up and cost a GET on every scaler tick.
+    """
+    if max_age is None:
+        max_age = 3 * Config.HEARTBEAT_INTERVAL
+    now = time.time()
+    instances = {}
+    stale = []
+    for key in list_objects_in_s3(bucket, prefix):
+        if not key.endswith(".json"):
+            continue
+        try:
+            beat = json.loads(get_object_text(bucket, key))
+        except Exception:
+            continue
+        if now - beat["timestamp"] > max_age:
+            stale.append(key)
+            continue
+        agg = instances.setdefault(beat["instance"], {
+            "in_flight": 0, "processed": 0, "last_activity": 0.0, "drained": True, "service_rate": None,
+        })
+        if beat.get("service_rate"):
+            # Processes on one instance serve in parallel, so their rates add up.
+            agg["service_rate"] = (agg["service_rate"] or 0.0) + beat["service_rate"]
+        agg["in_flight"] += beat["in_flight"]
+        agg["processed"] += beat["processed"]
+        agg["last_activity"] = max(agg["last_activity"], beat["last_activity"])
+        agg["drained"] = agg["drained"] and beat["drained"]
+    if stale:
+        # A process that is still alive simply writes its beat again.
+        delete_keys(bucket, stale, threads=1)
+        log.info(f"Deleted {len(stale)} stale heartbeat(s)")
+    return instances
+
+
+def request_drain(instance_id, bucket=Config.HEARTBEAT_BUCKET, prefix=Config.HEARTBEAT_PREFIX):
+    upload_file_to_s3(bucket, f"{prefix}{instance_id}/drain", "drain")
+    log.info(f"Requested drain of {instance_id}")
+
+
+def clear_heartbeats(instance_id, bucket=Config.HEARTBEAT_BUCKET, prefix=Config.HEARTBEAT_PREFIX):
+    delete_keys(bucket, iter_object_keys(bucket, f"{prefix}{instance_id}/"), threads=1)
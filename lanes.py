@@ -0,0 +1,106 @@
+# lanes.py
+import threading
+from create_log import init_logging
+
+log = init_logging("lanes", "lanes.log")
+from config import Config
+from aws_resources import receive_sqs_messages, delete_sqs_messages
+from visibility import VisibilityExtender
+from metrics import counter
+
+
+class PriorityLanes:
+    """Receives request batches from several queues, highest priority first.
+
+    ``queues`` are ordered from highest to lowest priority and every batch
+    comes from a single lane. With the "strict" policy a lane is only read
+    when all lanes above it are empty, so interactive requests never wait
+    behind bulk work. With "weighted", lane i gets first pick in weights[i]
+    out of sum(weights) polls, which keeps bulk work moving under sustained
+    interactive load. When every lane is empty the top lane is long-polled.
+
+    The top lane is always read with a short long-poll (``top_wait``, at
+    least 1s) rather than WaitTimeSeconds=0: a zero-wait receive samples only
+    some SQS servers and can come back empty for a lightly loaded queue that
+    has messages, which would hand the batch to a lower lane.
+
+    Receipts remember which lane they came from, so track/release/delete are
+    routed to the right queue and its visibility extender.
+    """
+
+    def __init__(self, queues=None, policy=Config.LANE_POLICY, weights=None, top_wait=Config.LANE_TOP_WAIT):
+        self.queues = list(queues or Config.REQUEST_LANES)
+        self.policy = policy
+        self.top_wait = max(1, int(top_wait))
+        weights = list(weights or Config.LANE_WEIGHTS)
+        self.weights = (weights + [1] * len(self.queues))[:len(self.queues)]
+        self.extenders = {q: VisibilityExtender(q) for q in self.queues}
+        self._credit = [0] * len(self.queues)
+        self._lane_of = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        for extender in self.extenders.values():
+            extender.start()
+        return self
+
+    def _order(self):
+        if self.policy != "weighted":
+            return self.queues
+        # Smooth weighted round-robin: the lane with the most credit leads.
+        with self._lock:
+            for i, w in enumerate(self.weights):
+                self._credit[i] += w
+            first = max(range(len(self.queues)), key=lambda i: self._credit[i])
+            self._credit[first] -= sum(self.weights)
+        return [self.queues[first]] + [q for i, q in enumerate(self.queues) if i != first]
+
+    def receive(self, max_messages, wait=10):
+        """Return (body, receipt) pairs from the first non-empty lane."""
+        lane, messages = self.queues[0], []
+        if len(self.queues) == 1:
+            messages = receive_sqs_messages(lane, max_messages, wait=wait)
+        else:
+            for lane in self._order():
+                lane_wait = self.top_wait if lane == self.queues[0] else 0
+                messages = receive_sqs_messages(lane, max_messages, wait=lane_wait)
+                if messages:
+                    break
+            else:
+                lane = self.queues[0]
+                messages = receive_sqs_messages(lane, max_messages, wait=wait)
+        if messages:
+            counter(f"worker_lane{self.queues.index(lane)}_messages_total",
+                    f"Messages received from {lane}").inc(len(messages))
+            with self._lock:
+                for _, receipt in messages:
+                    self._lane_of[receipt] = lane
+        return messages
+
+    def _by_lane(self, receipts):
+        lanes = {}
+        with self._lock:
+            for r in receipts:
+                lane = self._lane_of.get(r)
+                if lane is not None:
+                    lanes.setdefault(lane, []).append(r)
+        return lanes
+
+    def track(self, receipts):
+        for lane, rs in self._by_lane(receipts).items():
+            self.extenders[lane].track(rs)
+
+    def release(self, receipts):
+        """Stop extending ``receipts``; they can no longer be deleted through this object."""
+        for lane, rs in self._by_lane(receipts).items():
+            self.extenders[lane].release(rs)
+        with self._lock:
+            for r in receipts:
+                self._lane_of.pop(r, None)
+
+    def delete(self, receipts):
+        """Delete ``receipts`` from their lanes; returns the ones that failed."""
+        failed = []
+        for lane, rs in self._by_lane(receipts).items():
+            failed.extend(delete_sqs_messages(lane, rs))
+        return failed
@@ -0,0 +1,296 @@
+# local_backend.py
+# In-process stand-ins for the boto3 S3 and SQS clients used by aws_resources.
+# They implement the subset of client methods this project calls, with the
+# same argument names, response shapes and ClientError codes, so the whole
+# controller → queue → worker → result path runs on one machine
+# (STORAGE_BACKEND=local) without AWS.
+import io
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from botocore.exceptions import ClientError
+
+
+def _error(code, message, operation):
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+def _read_body(body) -> bytes:
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    if hasattr(body, "read"):
+        return body.read()
+    return bytes(body)
+
+
+class LocalS3:
+    """Buckets are dicts of key → bytes; missing buckets are created on write.
+    User metadata is kept per (bucket, key). Every read and write of a bucket
+    holds the lock, so listings never see a dict mutated mid-iteration."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._metadata = {}
+        self._lock = threading.RLock()
+
+    def _bucket(self, name, create=True):
+        with self._lock:
+            if name not in self._buckets:
+                if not create:
+                    raise _error("NoSuchBucket", f"Bucket {name} does not exist", "GetObject")
+                self._buckets[name] = OrderedDict()
+            return self._buckets[name]
+
+    def _get(self, bucket, key, operation):
+        with self._lock:
+            data = self._bucket(bucket).get(key)
+        if data is None:
+            code = "404" if operation == "HeadObject" else "NoSuchKey"
+            raise _error(code, f"Key {key} does not exist", operation)
+        return data
+
+    def head_bucket(self, Bucket):
+        with self._lock:
+            if Bucket not in self._buckets:
+                raise _error("404", "Not Found", "HeadBucket")
+        return {}
+
+    def create_bucket(self, Bucket, **kwargs):
+        self._bucket(Bucket)
+        return {"Location": f"/{Bucket}"}
+
+    def put_object(self, Bucket, Key, Body=b"", Metadata=None, **kwargs):
+        data = _read_body(Body)
+        with self._lock:
+            self._bucket(Bucket)[Key] = data
+            self._metadata[(Bucket, Key)] = dict(Metadata or {})
+        return {}
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, **kwargs):
+        self.put_object(Bucket=Bucket, Key=Key, Body=Fileobj, Metadata=(ExtraArgs or {}).get("Metadata"))
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        with open(Filename, "rb") as f:
+            self.put_object(Bucket=Bucket, Key=Key, Body=f)
+
+    def get_object(self, Bucket, Key, **kwargs):
+        with self._lock:
+            data = self._get(Bucket, Key, "GetObject")
+            metadata = dict(self._metadata.get((Bucket, Key), {}))
+        return {"Body": io.BytesIO(data), "ContentLength": len(data), "Metadata": metadata}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        with self._lock:
+            return {"ContentLength": len(self._get(Bucket, Key, "HeadObject")),
+                    "Metadata": dict(self._metadata.get((Bucket, Key), {}))}
+
+    def download_fileobj(self, Bucket, Key, Fileobj, **kwargs):
+        Fileobj.write(self._get(Bucket, Key, "GetObject"))
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        with open(Filename, "wb") as f:
+            self.download_fileobj(Bucket, Key, f)
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        with self._lock:
+            self._bucket(Bucket).pop(Key, None)
+            self._metadata.pop((Bucket, Key), None)
+        return {}
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        deleted = []
+        with self._lock:
+            objects = self._bucket(Bucket)
+            for obj in Delete.get("Objects", []):
+                objects.pop(obj["Key"], None)
+                self._metadata.pop((Bucket, obj["Key"]), None)
+                deleted.append({"Key": obj["Key"]})
+        return {"Deleted": deleted}
+
+    def list_objects_v2(self, Bucket, Prefix="", MaxKeys=1000, ContinuationToken=None, **kwargs):
+        with self._lock:
+            keys = sorted(k for k in self._buckets.get(Bucket, {}) if k.startswith(Prefix))
+            sizes = self._buckets.get(Bucket, {})
+            if ContinuationToken:
+                keys = [k for k in keys if k > ContinuationToken]
+            page = keys[:MaxKeys]
+            resp = {"KeyCount": len(page), "IsTruncated": len(keys) > MaxKeys}
+            if page:
+                resp["Contents"] = [{"Key": k, "Size": len(sizes[k])} for k in page]
+            if resp["IsTruncated"]:
+                resp["NextContinuationToken"] = page[-1]
+            return resp
+
+
+class _Message:
+    __slots__ = ("id", "body", "group", "visible_at", "receipt")
+
+    def __init__(self, body, group):
+        self.id = str(uuid.uuid4())
+        self.body = body
+        self.group = group
+        self.visible_at = 0.0
+        self.receipt = None
+
+
+class _Queue:
+    def __init__(self, name, attributes):
+        self.name = name
+        self.fifo = name.endswith(".fifo")
+        self.attributes = {"VisibilityTimeout": "30"}
+        self.attributes.update(attributes or {})
+        self.messages = []
+        self.receipts = {}
+
+
+class LocalSQS:
+    """Queues keyed by name; the queue URL is the name itself.
+
+    Supports visibility timeouts, receipt handles, long polling, batch
+    operations and FIFO message-group blocking. Queues referenced before
+    being created are created with default attributes.
+    """
+
+    def __init__(self):
+        self._queues = {}
+        self._cond = threading.Condition()
+
+    def _queue(self, url) -> _Queue:
+        name = url.rsplit("/", 1)[-1]
+        if name not in self._queues:
+            self._queues[name] = _Queue(name, {})
+        return self._queues[name]
+
+    def create_queue(self, QueueName, Attributes=None, **kwargs):
+        with self._cond:
+            if QueueName not in self._queues:
+                self._queues[QueueName] = _Queue(QueueName, Attributes)
+        return {"QueueUrl": QueueName}
+
+    def get_queue_url(self, QueueName, **kwargs):
+        with self._cond:
+            if QueueName not in self._queues:
+                raise _error("AWS.SimpleQueueService.NonExistentQueue",
+                             f"Queue {QueueName} does not exist", "GetQueueUrl")
+        return {"QueueUrl": QueueName}
+
+    def list_queues(self, QueueNamePrefix="", **kwargs):
+        with self._cond:
+            return {"QueueUrls": [n for n in self._queues if n.startswith(QueueNamePrefix)]}
+
+    def delete_queue(self, QueueUrl):
+        with self._cond:
+            self._queues.pop(QueueUrl.rsplit("/", 1)[-1], None)
+        return {}
+
+    def set_queue_attributes(self, QueueUrl, Attributes):
+        with self._cond:
+            self._queue(QueueUrl).attributes.update(Attributes)
+        return {}
+
+    def purge_queue(self, QueueUrl):
+        with self._cond:
+            q = self._queue(QueueUrl)
+            q.messages.clear()
+            q.receipts.clear()
+        return {}
+
+    def get_queue_attributes(self, QueueUrl, AttributeNames=None):
+        now = time.time()
+        with self._cond:
+            q = self._queue(QueueUrl)
+            visible = sum(1 for m in q.messages if m.visible_at <= now)
+            attrs = dict(q.attributes)
+            attrs["ApproximateNumberOfMessages"] = str(visible)
+            attrs["ApproximateNumberOfMessagesNotVisible"] = str(len(q.messages) - visible)
+        return {"Attributes": attrs}
+
+    def send_message(self, QueueUrl, MessageBody, MessageGroupId=None, **kwargs):
+        with self._cond:
+            msg = _Message(MessageBody, MessageGroupId)
+            self._queue(QueueUrl).messages.append(msg)
+            self._cond.notify_all()
+        return {"MessageId": msg.id}
+
+    def send_message_batch(self, QueueUrl, Entries):
+        successful = []
+        for e in Entries:
+            resp = self.send_message(QueueUrl, e["MessageBody"], e.get("MessageGroupId"))
+            successful.append({"Id": e["Id"], "MessageId": resp["MessageId"]})
+        return {"Successful": successful, "Failed": []}
+
+    def _take(self, q, max_messages, timeout):
+        now = time.time()
+        blocked = {m.group for m in q.messages if q.fifo and m.visible_at > now}
+        taken = []
+        for m in q.messages:
+            if len(taken) >= max_messages:
+                break
+            if m.visible_at > now or m.group in blocked:
+                continue
+            if m.receipt is not None:
+                q.receipts.pop(m.receipt, None)
+            m.receipt = str(uuid.uuid4())
+            m.visible_at = now + timeout
+            q.receipts[m.receipt] = m
+            taken.append({"MessageId": m.id, "Body": m.body, "ReceiptHandle": m.receipt})
+        return taken
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages=1, WaitTimeSeconds=0,
+                        VisibilityTimeout=None, **kwargs):
+        deadline = time.time() + WaitTimeSeconds
+        with self._cond:
+            q = self._queue(QueueUrl)
+            timeout = int(VisibilityTimeout if VisibilityTimeout is not None
+                          else q.attributes.get("VisibilityTimeout", 30))
+            while True:
+                taken = self._take(q, MaxNumberOfMessages, timeout)
+                remaining = deadline - time.time()
+                if taken or remaining <= 0:
+                    return {"Messages": taken} if taken else {}
+                # Wake on new messages, or to re-check expiring visibility.
+                self._cond.wait(min(remaining, 1.0))
+
+    def _delete(self, q, receipt):
+        m = q.receipts.pop(receipt, None)
+        if m is None:
+            return False
+        q.messages.remove(m)
+        return True
+
+    def delete_message(self, QueueUrl, ReceiptHandle):
+        with self._cond:
+            if not self._delete(self._queue(QueueUrl), ReceiptHandle):
+                raise _error("ReceiptHandleIsInvalid", "Invalid receipt handle", "DeleteMessage")
+            self._cond.notify_all()
+        return {}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        successful, failed = [], []
+        with self._cond:
+            q = self._queue(QueueUrl)
+            for e in Entries:
+                if self._delete(q, e["ReceiptHandle"]):
+                    successful.append({"Id": e["Id"]})
+                else:
+                    failed.append({"Id": e["Id"], "Code": "ReceiptHandleIsInvalid",
+                                   "Message": "Invalid receipt handle", "SenderFault": True})
+            self._cond.notify_all()
+        return {"Successful": successful, "Failed": failed}
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        successful, failed = [], []
+        now = time.time()
+        with self._cond:
+            q = self._queue(QueueUrl)
+            for e in Entries:
+                m = q.receipts.get(e["ReceiptHandle"])
+                if m is None:
+                    failed.append({"Id": e["Id"], "Code": "ReceiptHandleIsInvalid",
+                                   "Message": "Invalid receipt handle", "SenderFault": True})
+                    continue
+                m.visible_at = now + int(e["VisibilityTimeout"])
+                successful.append({"Id": e["Id"]})
+            self._cond.notify_all()
+        return {"Successful": successful, "Failed": failed}
@@ -0,0 +1,47 @@
+# local_node.py
+# Single-machine deployment: controller and workers in one process, sharing
+# the in-process queue/storage backend. Also the reproducible test bed for
+# benchmarks. Run with: python3 local_node.py
+import os
+import threading
+
+os.environ["STORAGE_BACKEND"] = "local"
+
+from create_log import init_logging
+
+log = init_logging("local_node", "local_node.log")
+from config import Config
+from aws_resources import ensure_bucket, ensure_queue
+
+
+def setup_local_infra():
+    ensure_bucket(Config.INPUT_BUCKET)
+    ensure_bucket(Config.OUTPUT_BUCKET)
+    ensure_queue(Config.REQUEST_QUEUE)
+    ensure_queue(Config.RESPONSE_QUEUE)
+    if Config.BULK_QUEUE:
+        ensure_queue(Config.BULK_QUEUE)
+
+
+def start_local_workers(count=Config.LOCAL_WORKERS):
+    import worker
+    from classifier.image_classification import configure_threads, warm_up
+
+    configure_threads(Config.TORCH_THREADS)
+    warm_up()
+    for i in range(count):
+        threading.Thread(target=worker.run_worker, name=f"local-worker-{i}", daemon=True).start()
+    log.info(f"Started {count} local worker(s).")
+
+
+def main():
+    setup_local_infra()
+    start_local_workers()
+
+    import web_controller
+
+    web_controller.app.run(host="0.0.0.0", port=5000, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ def setup_infra():
     ensure_bucket(Config.OUTPUT_BUCKET)
     ensure_queue(Config.REQUEST_QUEUE)
     ensure_queue(Config.RESPONSE_QUEUE)
+    if Config.BULK_QUEUE:
+        ensure_queue(Config.BULK_QUEUE)
     log.info("Infrastructure ready.")
 
 
@@ -33,7 +35,7 @@ def main():
     start_controller()
     start_worker()
     log.info("Auto-scaler running...")
-    auto_scale(Config.REQUEST_QUEUE)
+    auto_scale(Config.REQUEST_LANES)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+# messages.py
+import os
+import json
+import time
+import uuid
+from collections import namedtuple
+
+# ``reply_to`` is the response queue of the controller process waiting for
+# the result; None means the shared Config.RESPONSE_QUEUE.
+Request = namedtuple("Request", ["image", "id", "reply_to"])
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+def encode_request(image_name, request_id=None, reply_to=None) -> str:
+    data = {"image": image_name, "id": request_id, "ts": time.time()}
+    if reply_to:
+        data["reply_to"] = reply_to
+    return json.dumps(data)
+
+
+def decode_request(body) -> Request:
+    """Parse a request body. Plain-text bodies carry no request id."""
+    body = body.strip()
+    if body.startswith("{"):
+        data = json.loads(body)
+        return Request(data["image"], data.get("id"), data.get("reply_to"))
+    return Request(body, None, None)
+
+
+def sent_at(body):
+    """Enqueue time recorded by ``encode_request``, or None (also for bodies
+    that do not parse; those are dealt with when the request is decoded)."""
+    body = body.strip()
+    if not body.startswith("{"):
+        return None
+    try:
+        ts = json.loads(body).get("ts")
+    except (ValueError, AttributeError):
+        return None
+    return ts if isinstance(ts, (int, float)) else None
+
+
+def result_key(image_name) -> str:
+    return os.path.splitext(image_name)[0] + ".txt"
+
+
+def format_result(image_name, label) -> str:
+    return f"{image_name},{label}"
+
+
+def parse_label(image_name, result) -> str:
+    """Inverse of ``format_result`` for a known image name."""
+    return result[len(image_name) + 1:]
+
+
+def encode_result(request_id, image_name, label, confidence=None, tier=None) -> str:
+    data = {"id": request_id, "image": image_name, "result": format_result(image_name, label), "ts": time.time()}
+    if confidence is not None:
+        data["confidence"] = confidence
+    if tier is not None:
+        data["tier"] = tier
+    return json.dumps(data)
+
+
+def decode_result(body) -> dict:
+    return json.loads(body)
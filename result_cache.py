@@ -0,0 +1,107 @@
+# result_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from create_log import init_logging
+
+log = init_logging("cache", "cache.log")
+from aws_resources import upload_file_to_s3, get_object_text
+
+
+def hash_stream(stream, chunk_size=1024 * 1024) -> str:
+    """SHA-256 of a seekable stream; the stream is rewound afterwards."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Content-addressed label cache with in-flight request coalescing.
+
+    Labels are kept in a bounded in-memory LRU keyed by the image hash. When
+    ``bucket`` is set, labels are also written under ``prefix`` in that bucket
+    and looked up there on a memory miss. Identical images that arrive while
+    one is still being classified share a single pending job via ``claim``.
+    """
+
+    def __init__(self, max_entries, bucket=None, prefix="cache/"):
+        self.max_entries = max_entries
+        self.bucket = bucket
+        self.prefix = prefix
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def _remember(self, digest, label):
+        with self._lock:
+            self._entries[digest] = label
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, digest):
+        with self._lock:
+            label = self._entries.get(digest)
+            if label is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return label
+
+        if self.bucket:
+            try:
+                label = get_object_text(self.bucket, f"{self.prefix}{digest}.txt")
+            except Exception:
+                label = None
+            if label is not None:
+                self._remember(digest, label)
+                with self._lock:
+                    self.hits += 1
+                return label
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, digest, label):
+        self._remember(digest, label)
+        if self.bucket:
+            upload_file_to_s3(self.bucket, f"{self.prefix}{digest}.txt", label)
+
+    def claim(self, digest):
+        """Return (future, is_leader). Only the leader should submit the job."""
+        with self._lock:
+            future = self._inflight.get(digest)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._inflight[digest] = future
+            return future, True
+
+    def release(self, digest, label=None):
+        """Finish a claimed job; waiters get ``label`` (None on failure)."""
+        with self._lock:
+            future = self._inflight.pop(digest, None)
+        if label is not None:
+            self.put(digest, label)
+        if future is not None and not future.done():
+            future.set_result(label)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+            }
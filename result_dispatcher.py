@@ -0,0 +1,139 @@
+# result_dispatcher.py
+import os
+import re
+import time
+import atexit
+import socket
+import threading
+from concurrent.futures import Future
+from create_log import init_logging
+
+log = init_logging("dispatcher", "dispatcher.log")
+from config import Config
+from aws_resources import (
+    receive_sqs_messages, delete_sqs_messages, change_visibility_batch,
+    ensure_queue, get_queue_url, delete_queue, get_object_text_and_metadata
+)
+from messages import decode_result, result_key
+
+
+def process_queue_prefix(base=None):
+    """Name prefix shared by every controller's private response queue."""
+    base = base or Config.RESPONSE_QUEUE
+    return (base[:-len(".fifo")] if base.endswith(".fifo") else base) + "-p-"
+
+
+def process_queue_name(base=None):
+    """A response queue name unique to this host and process (standard queue)."""
+    tag = re.sub(r"[^A-Za-z0-9_-]", "-", f"{socket.gethostname()}-{os.getpid()}")
+    prefix = process_queue_prefix(base)
+    return prefix[:80 - len(tag)] + tag
+
+
+def stored_reply(image_name, request_id):
+    """The result the worker wrote to S3 for this request, as a reply dict.
+
+    None if there is none yet, or if the stored object was written for
+    another request (an earlier upload under the same file name).
+    """
+    try:
+        text, metadata = get_object_text_and_metadata(Config.OUTPUT_BUCKET, result_key(image_name))
+    except Exception:
+        return None
+    if metadata.get("request-id") != request_id:
+        return None
+    return {"result": text}
+
+
+class ResultDispatcher:
+    """Long-polls the response queue and completes per-request futures.
+
+    One background thread serves every waiting request, so a pending
+    ``/predict`` costs a dict entry instead of an S3 GET per second. Futures
+    resolve to the reply fields: "result", plus "confidence"/"tier" when the
+    worker reported them.
+
+    Requests name ``queue_url`` as their reply queue. On a queue shared with
+    other controllers (``shared=True``), a reply nobody here is waiting for
+    belongs to another process and is made visible again instead of deleted,
+    until it is older than WEB_TIMEOUT.
+    """
+
+    def __init__(self, queue_url, wait=20, shared=False):
+        self.queue_url = queue_url
+        self.wait = wait
+        self.shared = shared
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="result-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    @classmethod
+    def open(cls, routing=None):
+        """Start a dispatcher on this process's own response queue ("process")
+        or on the shared RESPONSE_QUEUE ("shared")."""
+        routing = routing or Config.RESPONSE_ROUTING
+        if routing == "shared":
+            return cls(get_queue_url(Config.RESPONSE_QUEUE), shared=True).start()
+        queue_url = ensure_queue(process_queue_name(), fifo=False)
+        atexit.register(delete_queue, queue_url)
+        return cls(queue_url).start()
+
+    def register(self, request_id) -> Future:
+        future = Future()
+        with self._lock:
+            self._pending[request_id] = future
+        return future
+
+    def discard(self, request_id):
+        with self._lock:
+            self._pending.pop(request_id, None)
+
+    def _complete(self, body):
+        """Resolve the waiter for a reply; False if this process has none."""
+        data = decode_result(body)
+        with self._lock:
+            future = self._pending.pop(data.get("id"), None)
+        if future is None:
+            return False
+        if not future.done():
+            future.set_result({k: v for k, v in data.items() if k not in ("id", "image", "ts")})
+        return True
+
+    def _is_foreign(self, body):
+        if not self.shared:
+            return False
+        try:
+            return time.time() - decode_result(body).get("ts", 0) < Config.WEB_TIMEOUT
+        except Exception:
+            return False
+
+    def _run(self):
+        log.info(f"Result dispatcher polling {self.queue_url}")
+        while True:
+            try:
+                messages = receive_sqs_messages(self.queue_url, 10, wait=self.wait)
+                done, foreign = [], []
+                for body, receipt in messages:
+                    try:
+                        matched = self._complete(body)
+                    except Exception as e:
+                        log.error(f"Bad result message {body!r}: {e}")
+                        matched = False
+                    if not matched and self._is_foreign(body):
+                        foreign.append(receipt)
+                    else:
+                        done.append(receipt)
+                if done:
+                    delete_sqs_messages(self.queue_url, done)
+                if foreign:
+                    # Another controller on the shared queue is waiting for these.
+                    change_visibility_batch(self.queue_url, foreign, 0)
+            except Exception as e:
+                log.error(f"Dispatcher error: {e}")
+                threading.Event().wait(3)
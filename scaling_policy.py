@@ -0,0 +1,148 @@
+# scaling_policy.py
+# Fleet-sizing policies for auto_scaler.py. No AWS imports, so recorded
+# queue-depth traces can be replayed offline:
+#   python3 scaling_policy.py trace.csv [threshold|rate] [boot_delay_seconds]
+import csv
+import math
+import sys
+from collections import deque
+
+from config import Config
+
+
+class ThresholdPolicy:
+    """The original rule: one worker per TASKS_PER_WORKER queued messages."""
+
+    def __init__(self, min_workers=Config.MIN_WORKERS, max_workers=Config.MAX_WORKERS,
+                 tasks_per_worker=Config.TASKS_PER_WORKER):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.tasks_per_worker = tasks_per_worker
+
+    def desired(self, now, depth, current, ready=None):
+        desired = min(self.max_workers, max(self.min_workers, depth // self.tasks_per_worker + 1))
+        if depth >= 40:
+            desired = max(10, desired)
+        return desired
+
+
+class RatePolicy:
+    """Sizes the fleet from arrival and service rates over a sliding window.
+
+    Arrivals are estimated from the change in queue depth plus what the
+    serving workers drained at ``service_rate`` images/s each. Workers only
+    count as busy for an interval when the queue was non-empty at both ends;
+    otherwise they are credited with the least work consistent with the
+    depth change, so an idle queue reads as zero arrivals. The target
+    covers the arrival rate and drains the current backlog within
+    ``target_latency`` seconds. Scale-out is rate limited by
+    ``out_cooldown``; scale-in only happens after the target has stayed
+    below the fleet size for ``in_cooldown`` seconds, and then only down to
+    the highest target seen in that period.
+    """
+
+    def __init__(self, min_workers=Config.MIN_WORKERS, max_workers=Config.MAX_WORKERS,
+                 service_rate=Config.WORKER_SERVICE_RATE, target_latency=Config.TARGET_LATENCY,
+                 window=Config.RATE_WINDOW, out_cooldown=Config.SCALE_OUT_COOLDOWN,
+                 in_cooldown=Config.SCALE_IN_COOLDOWN):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.service_rate = service_rate
+        self.target_latency = target_latency
+        self.window = window
+        self.out_cooldown = out_cooldown
+        self.in_cooldown = in_cooldown
+        self.samples = deque()
+        self.targets = deque()
+        self.last_scale_out = None
+        self.below_since = None
+
+    def arrival_rate(self):
+        if len(self.samples) < 2:
+            return 0.0
+        (t0, d0, _), (t1, d1, _) = self.samples[0], self.samples[-1]
+        if t1 <= t0:
+            return 0.0
+        served = 0.0
+        for (ta, da, wa), (tb, db, _) in zip(self.samples, list(self.samples)[1:]):
+            if da > 0 and db > 0:
+                served += (tb - ta) * wa * self.service_rate
+            else:
+                served += max(0, da - db)
+        return max(0.0, (d1 - d0 + served) / (t1 - t0))
+
+    def _target(self, depth):
+        rate = self.arrival_rate() + depth / max(self.target_latency, 1e-6)
+        needed = math.ceil(rate / self.service_rate) if rate > 0 else 0
+        return min(self.max_workers, max(self.min_workers, needed))
+
+    def desired(self, now, depth, current, ready=None):
+        serving = current if ready is None else ready
+        self.samples.append((now, depth, serving))
+        while self.samples and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+        target = self._target(depth)
+        self.targets.append((now, target))
+        while self.targets and now - self.targets[0][0] > self.in_cooldown:
+            self.targets.popleft()
+
+        if target > current:
+            self.below_since = None
+            if self.last_scale_out is not None and now - self.last_scale_out < self.out_cooldown:
+                return current
+            self.last_scale_out = now
+            return target
+
+        if target < current:
+            if self.below_since is None:
+                self.below_since = now
+            if now - self.below_since < self.in_cooldown:
+                return current
+            return max(t for _, t in self.targets)
+
+        self.below_since = None
+        return current
+
+
+POLICIES = {"threshold": ThresholdPolicy, "rate": RatePolicy}
+
+
+def make_policy(name=Config.SCALING_POLICY):
+    if name not in POLICIES:
+        raise ValueError(f"Unknown scaling policy {name!r}; expected one of {list(POLICIES)}")
+    return POLICIES[name]()
+
+
+def load_trace(path):
+    """Read (timestamp, depth) rows, e.g. as recorded by auto_scaler."""
+    with open(path, newline="") as f:
+        return [(float(row["timestamp"]), int(row["depth"])) for row in csv.DictReader(f)]
+
+
+def replay(policy, trace, boot_delay=0.0):
+    """Feed a recorded trace through a policy with a simulated fleet.
+
+    Launched workers count toward the fleet immediately but only serve after
+    ``boot_delay`` seconds. Returns (timestamp, depth, fleet, serving) rows.
+    """
+    fleet = []
+    rows = []
+    for now, depth in trace:
+        serving = sum(1 for t in fleet if now - t >= boot_delay)
+        desired = policy.desired(now, depth, len(fleet), serving)
+        if desired > len(fleet):
+            fleet.extend([now] * (desired - len(fleet)))
+        elif desired < len(fleet):
+            fleet = sorted(fleet)[:desired]
+        rows.append((now, depth, len(fleet), serving))
+    return rows
+
+
+if __name__ == "__main__":
+    trace = load_trace(sys.argv[1])
+    policy = make_policy(sys.argv[2] if len(sys.argv) > 2 else Config.SCALING_POLICY)
+    boot_delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    print("timestamp,depth,fleet,serving")
+    for row in replay(policy, trace, boot_delay=boot_delay):
+        print(",".join(str(v) for v in row))
@@ -8,7 +8,8 @@ import psutil
 
 from dotenv import load_dotenv
 from config import Config
-from aws_resources import purge_queue, clear_bucket
+from aws_resources import purge_queue, clear_bucket, expire_objects, delete_queues
+from result_dispatcher import process_queue_prefix
 
 # ==== Logging ====
 from create_log import init_logging
@@ -50,14 +51,21 @@ def shutdown():
     try:
         purge_queue(Config.REQUEST_QUEUE)
         purge_queue(Config.RESPONSE_QUEUE)
+        if Config.BULK_QUEUE:
+            purge_queue(Config.BULK_QUEUE)
+        # Per-process response queues left behind by controllers that were killed.
+        delete_queues(process_queue_prefix())
         log.info("SQS queues purged.")
     except Exception as e:
         log.warning(f"Queue purge failed: {e}")
 
     # Clear buckets
     try:
-        clear_bucket(Config.INPUT_BUCKET)
-        clear_bucket(Config.OUTPUT_BUCKET)
+        for bucket in (Config.INPUT_BUCKET, Config.OUTPUT_BUCKET):
+            if Config.CLEANUP_EXPIRY_DAYS > 0:
+                expire_objects(bucket, Config.CLEANUP_EXPIRY_DAYS)
+            else:
+                clear_bucket(bucket)
         log.info("S3 buckets cleared.")
     except Exception as e:
         log.warning(f"S3 bucket cleanup failed: {e}")
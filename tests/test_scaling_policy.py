@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from scaling_policy import RatePolicy, replay
+
+
+def make_policy():
+    return RatePolicy(min_workers=1, max_workers=20, service_rate=1.0, target_latency=30,
+                      window=60, out_cooldown=30, in_cooldown=180)
+
+
+def test_idle_queue_scales_in_to_minimum():
+    policy = make_policy()
+    trace = [(float(t), 0) for t in range(0, 500, 5)]
+    fleet = [1] * 5
+    # Start from a fleet of 5 on an empty queue.
+    rows = []
+    for now, depth in trace:
+        desired = policy.desired(now, depth, len(fleet), len(fleet))
+        fleet = fleet[:desired] if desired < len(fleet) else fleet + [1] * (desired - len(fleet))
+        rows.append(len(fleet))
+    assert rows[-1] == 1
+
+
+def test_burst_then_idle_tail_scales_in():
+    # 100-deep burst drained over a minute, then an idle tail.
+    trace = [(float(t), 100 if t < 10 else max(0, 100 - (t - 10) * 2)) for t in range(0, 2000, 5)]
+    rows = replay(make_policy(), trace)
+    peak = max(fleet for _, _, fleet, _ in rows)
+    assert peak > 1
+    assert rows[-1][2] == 1
+
+
+def test_steady_backlog_keeps_capacity():
+    # Depth stays at 20 while 4 serving workers drain 1 img/s each: arrivals
+    # keep pace with the fleet, so it must not shrink.
+    policy = make_policy()
+    for t in range(0, 600, 5):
+        desired = policy.desired(float(t), 20, 4, 4)
+    assert desired >= 4
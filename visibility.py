@@ -0,0 +1,66 @@
+# visibility.py
+import time
+import threading
+from create_log import init_logging
+
+log = init_logging("visibility", "visibility.log")
+from config import Config
+from aws_resources import change_visibility_batch
+
+
+class VisibilityExtender:
+    """Keeps messages a worker is still processing invisible to other workers.
+
+    Every ``timeout / 2`` seconds all held receipts get their visibility
+    pushed out by another ``timeout`` seconds. A receipt is held for at most
+    ``max_hold`` seconds so a message that hangs a worker is eventually
+    handed to someone else.
+    """
+
+    def __init__(self, queue_url, timeout=Config.VISIBILITY_TIMEOUT, max_hold=Config.MAX_VISIBILITY_HOLD):
+        self.queue_url = queue_url
+        self.timeout = timeout
+        self.max_hold = max_hold
+        self._held = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def track(self, receipts):
+        now = time.time()
+        with self._lock:
+            for r in receipts:
+                self._held.setdefault(r, now)
+
+    def release(self, receipts):
+        with self._lock:
+            for r in receipts:
+                self._held.pop(r, None)
+
+    def _extend(self):
+        now = time.time()
+        with self._lock:
+            expired = [r for r, since in self._held.items() if now - since > self.max_hold]
+            for r in expired:
+                self._held.pop(r)
+            receipts = list(self._held)
+        if expired:
+            log.warning(f"Stopped extending {len(expired)} message(s) held over {self.max_hold}s")
+        if receipts:
+            failed = change_visibility_batch(self.queue_url, receipts, self.timeout)
+            # A receipt that can no longer be extended is gone (deleted or
+            # already redelivered); stop trying.
+            self.release(failed)
+
+    def _run(self):
+        while True:
+            time.sleep(max(1.0, self.timeout / 2))
+            try:
+                self._extend()
+            except Exception as e:
+                log.error(f"Visibility extension failed: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="visibility", daemon=True)
+            self._thread.start()
+        return self
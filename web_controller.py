@@ -1,21 +1,104 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from create_log import init_logging
 import time
-import tempfile, os
+import json
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 log = init_logging("controller", "controller.log")
 from config import Config
 from aws_resources import (
     ensure_bucket, upload_file_to_s3,
-    send_sqs_message, get_queue_url, get_object_text
+    send_sqs_message, send_sqs_messages, get_queue_url, get_object_text
 )
+from batch_jobs import JobStore, extract_uploads
+from messages import new_request_id, encode_request, result_key, format_result, parse_label
+from result_dispatcher import ResultDispatcher, stored_reply
+from result_cache import ResultCache, hash_stream
+import metrics
+from metrics import span, counter
 
 app = Flask(__name__)
+jobs = JobStore(Config.MAX_BATCH_JOBS, on_evict=lambda job: release_job(job))
+upload_pool = ThreadPoolExecutor(max_workers=Config.BATCH_UPLOAD_THREADS, thread_name_prefix="batch-upload")
 
 # Initialize once
 ensure_bucket(Config.INPUT_BUCKET)
 ensure_bucket(Config.OUTPUT_BUCKET)
 request_queue_url = get_queue_url(Config.REQUEST_QUEUE)
-response_queue_url = get_queue_url(Config.RESPONSE_QUEUE)
+# /predict_batch goes to the low-priority lane so it cannot starve /predict.
+bulk_queue_url = get_queue_url(Config.BULK_QUEUE) if Config.BULK_QUEUE else request_queue_url
+dispatcher = ResultDispatcher.open() if Config.RESULT_DELIVERY == "queue" else None
+reply_to = dispatcher.queue_url if dispatcher else None
+cache = ResultCache(
+    Config.RESULT_CACHE_SIZE, Config.OUTPUT_BUCKET if Config.RESULT_CACHE_PERSIST else None
+) if Config.RESULT_CACHE_SIZE > 0 else None
+
+
+def poll_result(image_name, request_id, timeout):
+    start = time.time()
+    while time.time() - start < timeout:
+        reply = stored_reply(image_name, request_id)
+        if reply is not None:
+            return reply
+        time.sleep(1)
+    return None
+
+
+def wait_for_result(image_name, request_id, future):
+    """Return the reply dict ("result", plus "confidence"/"tier" if known) or None."""
+    if future is None:
+        return poll_result(image_name, request_id, Config.WEB_TIMEOUT)
+    try:
+        return future.result(timeout=Config.WEB_TIMEOUT)
+    except FutureTimeout:
+        # The reply may have been lost; the worker also wrote it to S3.
+        return stored_reply(image_name, request_id)
+
+
+def submit_job(image_name, stream):
+    # Werkzeug keeps small uploads in memory and spools large ones to disk,
+    # so the stream can go straight to S3 without another temporary copy.
+    with span("controller_upload_seconds", "Upload of the image to the input bucket"):
+        upload_file_to_s3(Config.INPUT_BUCKET, image_name, stream)
+    log.info(f"Uploaded {image_name} to input bucket.")
+
+    # Send message to request queue
+    request_id = new_request_id()
+    future = dispatcher.register(request_id) if dispatcher else None
+    try:
+        with span("controller_enqueue_seconds", "Sending the request message"):
+            send_sqs_message(request_queue_url, encode_request(image_name, request_id, reply_to), group_key=image_name)
+        log.info(f"Queued image {image_name} for processing.")
+        with span("controller_wait_seconds", "Waiting for the worker's result"):
+            return wait_for_result(image_name, request_id, future)
+    finally:
+        if dispatcher:
+            dispatcher.discard(request_id)
+
+
+def cached_submit(image_name, stream):
+    digest = hash_stream(stream)
+    label = cache.get(digest)
+    if label is not None:
+        log.info(f"Cache hit for {image_name} ({digest[:12]})")
+        return {"result": format_result(image_name, label)}
+
+    future, leader = cache.claim(digest)
+    if not leader:
+        log.info(f"Joining in-flight job for {image_name} ({digest[:12]})")
+        try:
+            label = future.result(timeout=Config.WEB_TIMEOUT)
+        except FutureTimeout:
+            label = None
+        return {"result": format_result(image_name, label)} if label is not None else None
+
+    reply = None
+    try:
+        reply = submit_job(image_name, stream)
+    finally:
+        cache.release(digest, parse_label(image_name, reply["result"]) if reply is not None else None)
+    return reply
 
 
 @app.route("/", methods=["GET"])
@@ -36,29 +119,157 @@ def predict():
     image_name = image_file.filename
     log.info("Received image: %s", image_name)
 
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        tmp.write(image_file.read())
-        tmp_path = tmp.name
+    with span("controller_request_seconds", "End-to-end /predict latency"):
+        if cache is None:
+            reply = submit_job(image_name, image_file.stream)
+        else:
+            reply = cached_submit(image_name, image_file.stream)
+
+    if reply is not None:
+        counter("controller_results_total", "Requests answered with a result").inc()
+        log.info(f"Got result for {image_name}: {reply['result']}")
+        return jsonify(reply), 200
+    counter("controller_timeouts_total", "Requests that timed out").inc()
+    return jsonify({"error": "Timed out waiting for result"}), 504
 
-    upload_file_to_s3(Config.INPUT_BUCKET, image_name, tmp_path, is_path=True)
-    os.remove(tmp_path)
 
-    log.info(f"Uploaded {image_name} to input bucket.")
+@app.route("/stats", methods=["GET"])
+def stats():
+    return jsonify({"cache": cache.stats() if cache else None}), 200
 
-    # Send message to request queue
-    send_sqs_message(request_queue_url, image_name)
-    log.info(f"Queued image {image_name} for processing.")
 
-    start = time.time()
-    while time.time() - start < Config.WEB_TIMEOUT:
+def cache_gauges():
+    return {f"controller_cache_{k}": v for k, v in cache.stats().items()} if cache else {}
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return metrics.render(cache_gauges()), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+
+def stored_label(key):
+    try:
+        return parse_label(key, get_object_text(Config.OUTPUT_BUCKET, result_key(key)))
+    except Exception:
+        return None
+
+
+def _on_batch_result(job, name, key, digest, future):
+    text = future.result()["result"]
+    label = parse_label(key, text)
+    job.complete(name, label)
+    if cache is not None and digest is not None:
+        cache.put(digest, label)
+
+
+def release_job(job, names=None):
+    """Stop waiting for replies to ``names`` (default: every image) of ``job``."""
+    if dispatcher is None:
+        return
+    for name in job.keys if names is None else names:
+        request_id = job.request_ids.get(name)
+        if request_id:
+            dispatcher.discard(request_id)
+
+
+def submit_batch(job, uploads):
+    """Upload and enqueue (name, stream) pairs for ``job``; cache hits finish at once."""
+    misses = []
+    for name, stream in uploads:
+        name = job.add(name)
+        digest = None
+        if cache is not None:
+            digest = hash_stream(stream)
+            label = cache.get(digest)
+            if label is not None:
+                job.complete(name, label)
+                continue
+        misses.append((name, job.keys[name], stream, digest))
+
+    with span("controller_batch_upload_seconds", "Uploading all images of a batch"):
+        uploaded = list(upload_pool.map(
+            lambda m: upload_file_to_s3(Config.INPUT_BUCKET, m[1], m[2]), misses
+        ))
+
+    bodies, group_keys, queued = [], [], []
+    for (name, key, _, digest), ok in zip(misses, uploaded):
+        if not ok:
+            job.fail(name, "upload failed")
+            continue
+        request_id = new_request_id()
+        job.request_ids[name] = request_id
+        if dispatcher:
+            future = dispatcher.register(request_id)
+            future.add_done_callback(
+                lambda f, n=name, k=key, d=digest: _on_batch_result(job, n, k, d, f)
+            )
+        bodies.append(encode_request(key, request_id, reply_to))
+        group_keys.append(key)
+        queued.append(name)
+
+    failed = []
+    if bodies:
+        with span("controller_enqueue_seconds", "Sending the request message"):
+            failed = [queued[i] for i in send_sqs_messages(bulk_queue_url, bodies, group_keys)]
+    for name in failed:
+        job.fail(name, "enqueue failed")
+    release_job(job, failed)
+    counter("controller_batch_images_total", "Images submitted through /predict_batch").inc(len(job.keys))
+    log.info(f"Batch job {job.id}: {len(job.keys)} image(s), {len(bodies) - len(failed)} queued")
+
+
+@app.route("/predict_batch", methods=["POST"])
+def predict_batch():
+    files = [f for f in request.files.getlist("myfile") + request.files.getlist("files") if f.filename]
+    if not files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    job = jobs.create()
+    try:
+        submit_batch(job, extract_uploads(files))
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        # Archives are unpacked before anything is uploaded or queued.
+        log.error(f"Batch job {job.id} rejected: {e}")
+        release_job(job)
+        return jsonify({"error": f"Invalid batch: {e}", "job_id": job.id}), 400
+    except Exception as e:
+        log.error(f"Batch job {job.id} failed: {e}")
+        unsent = [name for name in job.pending() if name not in job.request_ids]
+        for name in unsent:
+            job.fail(name, "not submitted")
+        release_job(job, unsent)
+        # Images already queued keep running and can be followed at /jobs/<id>.
+        return jsonify({"error": f"Batch submission failed: {e}", "job_id": job.id,
+                        "queued": job.pending()}), 500
+
+    if request.args.get("mode") == "job":
+        return jsonify(job.summary(include_results=False)), 202
+
+    def stream():
+        poll = None if dispatcher else stored_label
+        yield json.dumps({"job_id": job.id, "total": len(job.keys)}) + "\n"
         try:
-            result = get_object_text(Config.OUTPUT_BUCKET, image_name.replace(".JPEG", ".txt"))
-            log.info(f"Got result for {image_name}: {result}")
-            return jsonify({"result": result}), 200
-        except Exception:
-            time.sleep(1)
+            for record in job.updates(Config.WEB_TIMEOUT, poll=poll):
+                yield json.dumps(record) + "\n"
+        finally:
+            # Late results are still found in S3 by /jobs/<id>.
+            release_job(job, job.pending())
 
-    return jsonify({"error": "Timed out waiting for result"}), 504
+    return Response(stream(), mimetype="application/x-ndjson")
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    # Without a dispatcher, or for results that arrived after the stream
+    # ended, the output bucket is the source of truth.
+    for name in job.pending():
+        label = stored_label(job.keys[name])
+        if label is not None:
+            job.complete(name, label)
+    return jsonify(job.summary()), 200
 
 
 if __name__ == "__main__":
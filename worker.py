@@ -1,48 +1,418 @@
 # worker.py
 import os
 import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 from create_log import init_logging
 
 log = init_logging("worker", "worker.log")
-import uuid
 from config import Config
 from aws_resources import (
-    receive_sqs_message, delete_sqs_message,
-    download_from_s3, upload_file_to_s3
+    send_sqs_messages,
+    download_to_buffer, upload_file_to_s3, get_object_text_and_metadata,
+    list_objects_in_s3, download_from_s3, get_instance_id, tag_instance
 )
-from classifier.image_classification import classify
+from heartbeat import Heartbeat
+from lanes import PriorityLanes
+from messages import decode_request, encode_result, format_result, result_key, parse_label, sent_at
+import metrics
+from metrics import span, counter, histogram
+from classifier.image_classification import (
+    classify_batch_detailed, load_image, configure_threads, share_model, warm_up
+)
+
+heartbeat = Heartbeat(service_rate=lambda: service_rate())
+
+
+def sync_artifacts():
+    """Pull prebuilt model artifacts from S3 into the local model cache."""
+    if not Config.ARTIFACT_BUCKET:
+        return
+    for key in list_objects_in_s3(Config.ARTIFACT_BUCKET, Config.ARTIFACT_PREFIX):
+        local_path = os.path.join(Config.MODEL_CACHE_DIR, key[len(Config.ARTIFACT_PREFIX):])
+        if key.endswith("/") or os.path.exists(local_path):
+            continue
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        download_from_s3(Config.ARTIFACT_BUCKET, key, local_path)
+        log.info(f"Fetched model artifact {key}")
+
+
+def mark_ready():
+    """Tag this instance Status=ready so the scaler can count it as serving."""
+    instance_id = get_instance_id()
+    if instance_id is None:
+        log.info("Worker ready (not on EC2, skipping readiness tag).")
+        return
+    try:
+        tag_instance(instance_id, "Status", "ready")
+    except Exception as e:
+        log.warning(f"Failed to report readiness: {e}")
+
+
+def fetch_image(image_name):
+    with download_to_buffer(Config.INPUT_BUCKET, image_name) as buf:
+        return load_image(buf)
+
+
+def note_received(messages):
+    now = time.time()
+    wait = histogram("worker_queue_wait_seconds", "Time from enqueue to receipt by a worker")
+    for body, _ in messages:
+        ts = sent_at(body)
+        if ts is not None:
+            wait.observe(max(0.0, now - ts))
+
+
+def service_rate():
+    """Images per second of service time measured in this process, or None."""
+    service = histogram("worker_service_seconds", "Time spent serving a batch").snapshot()
+    images = counter("worker_images_total", "Images classified").value
+    if not service["sum"] or not images:
+        return None
+    return images / service["sum"]
+
+
+def existing_result(request):
+    """Result text already stored for this very request, if any.
+
+    Results are tagged with the request id that produced them, so only a
+    redelivered message matches; a new upload reusing an old file name does not.
+    """
+    if not request.id:
+        return None
+    try:
+        text, metadata = get_object_text_and_metadata(Config.OUTPUT_BUCKET, result_key(request.image))
+    except Exception:
+        return None
+    return text if metadata.get("request-id") == request.id else None
+
+
+def fetch(request):
+    """Return (image, None) to classify, or (None, label) when the request
+    already has a stored result (e.g. a redelivered message)."""
+    if Config.SKIP_EXISTING:
+        existing = existing_result(request)
+        if existing is not None:
+            counter("worker_skipped_total", "Messages whose result already existed").inc()
+            return None, parse_label(request.image, existing)
+    with span("worker_download_seconds", "Download and decode of one image"):
+        return fetch_image(request.image), None
+
+
+def write_result(request, label):
+    metadata = {"request-id": request.id} if request.id else None
+    with span("worker_result_write_seconds", "Writing one result to the output bucket"):
+        return upload_file_to_s3(Config.OUTPUT_BUCKET, result_key(request.image),
+                                 format_result(request.image, label), metadata=metadata)
+
+
+def finish_batch(completed, write=True):
+    """Store results for (request, prediction, receipt) tuples.
+
+    ``prediction`` is a classify_batch_detailed dict; only "label" is required.
+
+    Results are written to the output bucket (unless ``write`` is False
+    because they are already there) and, for requests that carry an id,
+    published on the response queue named in the request. Returns the
+    receipts safe to delete.
+    """
+    done, replies = [], {}
+    for request, prediction, receipt in completed:
+        image_name, label = request.image, prediction["label"]
+        if write:
+            log.info(f"Prediction done: {image_name} → {label}")
+        else:
+            log.info(f"Skipping {image_name}: result already stored")
+        if not write or write_result(request, label):
+            done.append(receipt)
+            if request.id:
+                replies.setdefault(request.reply_to or Config.RESPONSE_QUEUE, []).append(
+                    encode_result(request.id, image_name, label,
+                                  prediction.get("confidence"), prediction.get("tier")))
+    for queue_url, bodies in replies.items():
+        try:
+            send_sqs_messages(queue_url, bodies)
+        except Exception as e:
+            # The S3 result is still there for the controller to fall back on.
+            log.error(f"Failed to publish {len(bodies)} result(s) to {queue_url}: {e}")
+    return done
+
+
+def parse_request(body):
+    """decode_request, or None (logged) for a body that cannot be parsed."""
+    try:
+        return decode_request(body)
+    except Exception as e:
+        log.error(f"Dropping malformed request {body!r}: {e}")
+        counter("worker_malformed_total", "Request bodies that could not be parsed").inc()
+        return None
+
+
+def process_messages(messages):
+    """Classify a batch of (body, receipt) messages in one forward pass.
+
+    A message that fails to download or decode is left on the queue and does not
+    affect the rest of the batch; one whose body cannot be parsed is deleted.
+    Returns the receipts that are safe to delete.
+    """
+    pending, images, skipped, malformed = [], [], [], []
+    for body, receipt in messages:
+        request = parse_request(body)
+        if request is None:
+            malformed.append(receipt)
+            continue
+        try:
+            image, label = fetch(request)
+        except Exception as e:
+            log.error(f"Failed to fetch {request.image}: {e}")
+            continue
+        if image is None:
+            skipped.append((request, {"label": label}, receipt))
+            continue
+        images.append(image)
+        pending.append((request, receipt))
+
+    done = malformed + (finish_batch(skipped, write=False) if skipped else [])
+    if not images:
+        return done
+
+    log.info(f"Running prediction for {len(images)} image(s)")
+    with span("worker_inference_seconds", "classify_batch call per batch"):
+        predictions = classify_batch_detailed(images)
+    counter("worker_images_total", "Images classified").inc(len(images))
+    return done + finish_batch([(request, prediction, receipt)
+                                for (request, receipt), prediction in zip(pending, predictions)])
 
 
 def start_worker():
     log.info("Worker started.")
+    lanes = PriorityLanes().start()
     while True:
         try:
-            msg = receive_sqs_message(Config.REQUEST_QUEUE)
-            if msg is None:
+            if heartbeat.draining.is_set():
+                heartbeat.park()
                 time.sleep(2)
                 continue
-            log.info(f"msg = {msg} (type: {type(msg)})")
-            body, receipt = msg
-            image_name = body.strip()
-
-            tmp_path = f"/tmp/{uuid.uuid4()}_{image_name}"
-            download_from_s3(Config.INPUT_BUCKET, image_name, tmp_path)
-
-            log.info(f"Running prediction for {image_name}")
-            label = classify(tmp_path)
-            log.info(f"Prediction done: {image_name} → {label}")
-
-            result_text = f"{image_name},{label}"
-            output_key = os.path.splitext(image_name)[0] + ".txt"
-            upload_file_to_s3(Config.OUTPUT_BUCKET, output_key, result_text)
+            messages = lanes.receive(Config.BATCH_SIZE)
+            if not messages:
+                time.sleep(2)
+                continue
+            log.info(f"Received {len(messages)} message(s)")
 
-            delete_sqs_message(Config.REQUEST_QUEUE, receipt)
-            os.remove(tmp_path)
+            receipts = [receipt for _, receipt in messages]
+            note_received(messages)
+            heartbeat.begin(len(messages))
+            lanes.track(receipts)
+            done = []
+            try:
+                with span("worker_service_seconds", "Time spent serving a batch"):
+                    done = process_messages(messages)
+                if done:
+                    lanes.delete(done)
+            finally:
+                lanes.release(receipts)
+                heartbeat.end(len(messages), processed=len(done))
 
         except Exception as e:
             log.error(f"Worker error: {e}")
             time.sleep(3)
 
 
+class PipelineWorker:
+    """Overlaps download/decode, inference and result upload.
+
+    A receiver thread pulls messages and hands downloads to a fetch pool, the
+    calling thread batches decoded images through the model, and a writer
+    thread uploads results and acknowledges messages. Bounded queues between
+    the stages stop the receiver from running ahead of inference.
+    """
+
+    def __init__(self, queues=None, batch_size=Config.BATCH_SIZE,
+                 fetch_threads=Config.FETCH_THREADS, depth=Config.PIPELINE_DEPTH):
+        if isinstance(queues, str):
+            queues = [queues]
+        self.batch_size = batch_size
+        self.fetch_pool = ThreadPoolExecutor(max_workers=fetch_threads, thread_name_prefix="fetch")
+        self.fetched = queue.Queue(maxsize=max(1, depth) * batch_size)
+        self.results = queue.Queue(maxsize=max(1, depth))
+        self.stop_event = threading.Event()
+        self.lanes = PriorityLanes(queues)
+
+    def _receive_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                if heartbeat.draining.is_set():
+                    heartbeat.park()
+                    time.sleep(2)
+                    continue
+                messages = self.lanes.receive(self.batch_size)
+                if not messages:
+                    # An empty poll is not activity; keep last_activity honest
+                    # so the scaler can pick the longest-idle worker.
+                    continue
+                note_received(messages)
+                heartbeat.begin(len(messages))
+                self.lanes.track([receipt for _, receipt in messages])
+                for body, receipt in messages:
+                    request = parse_request(body)
+                    if request is None:
+                        self.lanes.delete([receipt])
+                        self.lanes.release([receipt])
+                        heartbeat.end(1)
+                        continue
+                    future = self.fetch_pool.submit(fetch, request)
+                    self.fetched.put((request, receipt, future))
+            except Exception as e:
+                log.error(f"Receiver error: {e}")
+                time.sleep(3)
+
+    def _write_loop(self):
+        while True:
+            item = self.results.get()
+            if item is None:
+                return
+            batch, write = item
+            done = []
+            try:
+                done = finish_batch(batch, write)
+                if done:
+                    self.lanes.delete(done)
+            except Exception as e:
+                log.error(f"Writer error: {e}")
+            finally:
+                self.lanes.release([receipt for *_, receipt in batch])
+                heartbeat.end(len(batch), processed=len(done))
+
+    def _next_batch(self):
+        items = [self.fetched.get()]
+        while len(items) < self.batch_size:
+            try:
+                items.append(self.fetched.get_nowait())
+            except queue.Empty:
+                break
+
+        pending, images, skipped = [], [], []
+        for request, receipt, future in items:
+            try:
+                image, label = future.result()
+            except Exception as e:
+                log.error(f"Failed to fetch {request.image}: {e}")
+                self.lanes.release([receipt])
+                heartbeat.end(1)
+                continue
+            if image is None:
+                skipped.append((request, {"label": label}, receipt))
+                continue
+            images.append(image)
+            pending.append((request, receipt))
+        return pending, images, skipped
+
+    def run(self):
+        log.info(f"Pipelined worker started (batch={self.batch_size}).")
+        self.lanes.start()
+        threading.Thread(target=self._receive_loop, name="receiver", daemon=True).start()
+        writer = threading.Thread(target=self._write_loop, name="writer", daemon=True)
+        writer.start()
+        try:
+            while not self.stop_event.is_set():
+                pending = []
+                try:
+                    pending, images, skipped = self._next_batch()
+                    if skipped:
+                        self.results.put((skipped, False))
+                    if not images:
+                        continue
+                    with span("worker_service_seconds", "Time spent serving a batch"):
+                        with span("worker_inference_seconds", "classify_batch call per batch"):
+                            predictions = classify_batch_detailed(images)
+                    counter("worker_images_total", "Images classified").inc(len(images))
+                    log.info(f"Classified batch of {len(images)}")
+                    self.results.put(([(request, prediction, receipt)
+                                       for (request, receipt), prediction in zip(pending, predictions)], True))
+                except Exception as e:
+                    log.error(f"Inference error: {e}")
+                    self.lanes.release([receipt for *_, receipt in pending])
+                    heartbeat.end(len(pending))
+                    time.sleep(3)
+        finally:
+            self.stop_event.set()
+            self.results.put(None)
+            writer.join()
+            self.fetch_pool.shutdown(wait=False)
+
+
+def run_worker():
+    if Config.WORKER_MODE == "pipeline":
+        PipelineWorker(Config.REQUEST_LANES).run()
+    else:
+        start_worker()
+
+
+def _serve_process(index, num_threads, ready):
+    configure_threads(num_threads)
+    if Config.WORKER_METRICS_PORT:
+        metrics.serve_metrics(Config.WORKER_METRICS_PORT + index)
+    warm_up()
+    heartbeat.start()
+    ready.set()
+    log.info(f"Worker process {index} (pid {os.getpid()}) serving with {num_threads} thread(s).")
+    run_worker()
+
+
+def start_worker_pool(num_processes=Config.WORKER_PROCESSES, num_threads=Config.TORCH_THREADS):
+    """Run one model-serving process per slot and restart any that die.
+
+    The model is loaded into shared memory before forking so every child maps
+    the same weights rather than loading its own copy.
+    """
+    num_processes = num_processes if num_processes > 0 else os.cpu_count() or 1
+    if num_threads <= 0:
+        num_threads = max(1, (os.cpu_count() or 1) // num_processes)
+
+    configure_threads(num_threads)
+    share_model()
+    ctx = multiprocessing.get_context("fork")
+    procs = {}
+
+    def spawn(index):
+        ready = ctx.Event()
+        p = ctx.Process(target=_serve_process, args=(index, num_threads, ready),
+                        name=f"worker-{index}", daemon=True)
+        p.start()
+        procs[index] = p
+        return ready
+
+    log.info(f"Starting worker pool: {num_processes} process(es) x {num_threads} thread(s).")
+    events = [spawn(i) for i in range(num_processes)]
+    for ready in events:
+        ready.wait(timeout=300)
+    mark_ready()
+
+    try:
+        while True:
+            for index, p in list(procs.items()):
+                if not p.is_alive():
+                    log.warning(f"Worker process {index} exited with code {p.exitcode}, restarting.")
+                    spawn(index)
+            time.sleep(2)
+    finally:
+        for p in procs.values():
+            p.terminate()
+        for p in procs.values():
+            p.join(timeout=5)
+
+
 if __name__ == "__main__":
-    start_worker()
+    sync_artifacts()
+    if Config.WORKER_PROCESSES != 1:
+        start_worker_pool()
+    else:
+        configure_threads(Config.TORCH_THREADS)
+        if Config.WORKER_METRICS_PORT:
+            metrics.serve_metrics(Config.WORKER_METRICS_PORT)
+        warm_up()
+        heartbeat.start()
+        mark_ready()
+        run_worker()